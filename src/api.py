@@ -1,17 +1,74 @@
-from fastapi import FastAPI
-from pydantic import BaseModel, Field
-import joblib
-import pandas as pd
+import time
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, List, Optional
 
-from src.inference import predict_single
+from fastapi import Body, FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field, ValidationError
 
-# load saved model pipeline and tenure bucket transformer
-artifacts = joblib.load('outputs/churn_model_artifacts.pkl')
-pipeline = artifacts['pipeline']
-tenure_bucket = artifacts['tenure_bucket']
+from src.inference import (
+    predict_single, predict_many, explain_many, customer_score, most_at_risk, router, cache
+)
+from src.routing import PRIMARY, UnknownModelVersionError
+from src.registry import ModelUnavailableError
+from src.feature_store import FeatureStoreUnavailableError
+from src.batching import MicroBatcher
+from src.streaming import NDJSONStreamingResponse, score_ndjson
+from src.metrics import REQUEST_LATENCY, observe_stage, render_prometheus, stage_timer
+from src.config import (
+    MICRO_BATCHING, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, MODEL_RELOAD_INTERVAL,
+    METRICS_ENABLED, EXPLAIN_TOP_K, STREAM_BATCH_SIZE, STREAM_MAX_LINE_BYTES
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # load the shared models before the first request, if they exist yet
+    for name, error in router.warm_up().items():
+        print(f"Starting without model {name!r}: {error}")
+    # swap in new artifacts written by run_serve without a restart
+    if MODEL_RELOAD_INTERVAL > 0:
+        router.start_watching(MODEL_RELOAD_INTERVAL)
+    yield
+    router.stop_watching()
 
 # create FastAPI app
-app = FastAPI(title="Customer Churn Forecast API")
+app = FastAPI(title="Customer Churn Forecast API", lifespan=lifespan)
+
+@app.exception_handler(ModelUnavailableError)
+def model_unavailable(request: Request, exc: ModelUnavailableError):
+    # no artifact yet: tell the client to retry instead of failing with a 500
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+@app.exception_handler(UnknownModelVersionError)
+def unknown_model_version(request: Request, exc: UnknownModelVersionError):
+    return JSONResponse(status_code=404, content={"detail": f"unknown model version {exc.args[0]!r}"})
+
+@app.exception_handler(FeatureStoreUnavailableError)
+def feature_store_unavailable(request: Request, exc: FeatureStoreUnavailableError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+if METRICS_ENABLED:
+    @app.middleware("http")
+    async def time_request(request: Request, call_next):
+        # start of the request, used to time body parsing and validation
+        request.state.received_at = time.perf_counter()
+        response = await call_next(request)
+        # label by route template, not raw path, to keep label values bounded
+        route = request.scope.get("route")
+        REQUEST_LATENCY.observe(
+            time.perf_counter() - request.state.received_at,
+            route.path if route is not None else "unmatched"
+        )
+        return response
+
+# coalesce concurrent /predict calls into batched model calls
+batcher = MicroBatcher(
+    predict_many,
+    max_batch_size=BATCH_MAX_SIZE,
+    max_wait_ms=BATCH_MAX_WAIT_MS
+)
 
 # define input schema for a customer
 class Customer(BaseModel):
@@ -36,11 +93,170 @@ class Customer(BaseModel):
     TotalCharges: float
 
 @app.post("/predict")
-def predict(customer: Customer):
+async def predict(
+    customer: Customer, request: Request, response: Response,
+    x_model_version: Optional[str] = Header(None)
+):
     """
     receive a JSON payload for one customer,
     compute churn probability,
-    and return the probability plus a simple conclusion
+    and return the probability plus a simple conclusion.
+    the X-Model-Version header picks a loaded model version,
+    otherwise the request is routed by CHURN_ROUTE_PERCENT
+    """
+    # FastAPI has parsed and validated the body by the time we get here
+    if METRICS_ENABLED:
+        observe_stage('validate', time.perf_counter() - request.state.received_at)
+
+    version = router.route(x_model_version)
+    response.headers["X-Model-Version"] = version
+
+    # queue the customer and score it together with concurrent requests
+    # (batches are scored by the primary, other versions score directly)
+    if MICRO_BATCHING and version == PRIMARY:
+        return await batcher.submit(customer.model_dump())
+
+    # score on its own in a worker thread
+    return await run_in_threadpool(predict_single, customer.model_dump(), version)
+
+@app.get("/predict/stats")
+def predict_stats():
+    """
+    batch-size and queue-wait statistics of the /predict micro-batcher
+    """
+    return batcher.stats()
+
+@app.post("/predict/batch")
+def predict_batch(
+    response: Response, customers: List[Any] = Body(...),
+    x_model_version: Optional[str] = Header(None)
+):
+    """
+    receive a JSON list of customers,
+    validate each record on its own,
+    and score all valid records in one vectorized pass.
+    results keep the input order; invalid records get an error entry
+    instead of failing the whole batch
+    """
+    version = router.route(x_model_version)
+    response.headers["X-Model-Version"] = version
+    results: List[dict] = [None] * len(customers)
+    valid_rows, valid_index = [], []
+
+    # validate each record separately so one bad row doesn't fail the batch
+    with stage_timer('validate'):
+        for i, raw in enumerate(customers):
+            try:
+                customer = Customer.model_validate(raw)
+            except ValidationError as exc:
+                results[i] = {
+                    "index": i,
+                    "error": exc.errors(include_url=False, include_context=False)
+                }
+                continue
+            valid_rows.append(customer.model_dump())
+            valid_index.append(i)
+
+    # score all valid records at once and put them back in place
+    for i, result in zip(valid_index, predict_many(valid_rows, version)):
+        results[i] = {"index": i, **result}
+
+    return {"results": results}
+
+@app.post("/predict/stream")
+async def predict_stream(
+    request: Request, batch_size: int = Query(STREAM_BATCH_SIZE, ge=1),
+    x_model_version: Optional[str] = Header(None)
+):
+    """
+    receive newline-delimited JSON, one customer per line,
+    and stream back one NDJSON result per line in input order.
+    the body is parsed while it arrives and scored batch_size customers
+    at a time; invalid lines get an error entry like in /predict/batch
+    """
+    # load the model before the response starts, so a missing model is a 503
+    version = router.route(x_model_version)
+    router.get(version)
+    return NDJSONStreamingResponse(
+        score_ndjson(
+            request.stream(), Customer, partial(predict_many, version=version),
+            batch_size, STREAM_MAX_LINE_BYTES
+        ),
+        headers={"X-Model-Version": version}
+    )
+
+@app.post("/explain")
+def explain(customer: Customer, top_k: int = Query(EXPLAIN_TOP_K, ge=1)):
+    """
+    receive a JSON payload for one customer
+    and return the churn probability plus the top_k features
+    by absolute SHAP contribution (in log-odds, relative to base_value)
+    """
+    return explain_many([customer.model_dump()], top_k)[0]
+
+@app.get("/customers/at-risk")
+def customers_at_risk(
+    k: int = Query(10, ge=1, le=10_000),
+    segment: Optional[str] = None,
+    value: Optional[str] = None
+):
+    """
+    the k customers with the highest stored churn probability,
+    optionally only those whose segment column (e.g. Contract) equals value,
+    read from the lists precomputed by the feature store
+    """
+    if (segment is None) != (value is None):
+        raise HTTPException(status_code=400, detail="segment and value go together")
+    try:
+        return {"results": most_at_risk(k, segment, value)}
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"no precomputed segment {segment!r}")
+
+@app.get("/customers/{customer_id}/score")
+def customer_score_endpoint(customer_id: str, features: bool = False):
+    """
+    the stored churn probability of one customer, looked up by customerID
+    in the feature store instead of scoring a full payload;
+    features=true also returns the transformed feature row
+    """
+    result = customer_score(customer_id, features)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"unknown customer {customer_id!r}")
+    return result
+
+@app.get("/models")
+def models():
+    """
+    the loaded model versions, their artifacts, routing share and shadow role
+    """
+    return router.versions()
+
+@app.get("/models/stats")
+def models_stats():
+    """
+    requests routed per version and the running comparison of every
+    shadow version against the primary on the same customers
+    """
+    return router.stats_snapshot()
+
+@app.get("/cache/stats")
+def cache_stats():
+    """
+    hit, miss and eviction counters of the prediction cache
+    """
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """
+    per-stage latency, batch-size and request latency histograms
+    in the Prometheus text format
     """
-    # convert the pydantic model to a DataFrame
-    return predict_single(customer.dict())
+    if not METRICS_ENABLED:
+        return PlainTextResponse("# metrics disabled\n")
+    return PlainTextResponse(
+        render_prometheus(),
+        media_type="text/plain; version=0.0.4"
+    )
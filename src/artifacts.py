@@ -0,0 +1,139 @@
+import glob
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import sklearn
+
+from src.compiled import CompiledScorer
+
+# bump when the layout of the array artifact changes
+ARRAY_FORMAT_VERSION = 1
+
+MANIFEST = 'manifest.json'
+
+def save_array_artifact(scorer: CompiledScorer, path, extra=None):
+    """
+    Save a compiled scorer as a directory of raw .npy arrays plus a JSON manifest.
+    - scorer: CompiledScorer built from the fitted pipeline
+    - path: target directory, replaced atomically if it already exists
+      (see replace_directory)
+    - extra: additional JSON-serializable values stored in the manifest
+    Workers can open the arrays with mmap_mode='r' and share one copy
+    of the pages instead of unpickling a private copy of the pipeline.
+    """
+    path = str(path).rstrip('/')
+    tmp = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    # scaler statistics, coefficients and encoder state as raw arrays
+    np.save(os.path.join(tmp, 'means.npy'), scorer.means)
+    np.save(os.path.join(tmp, 'scales.npy'), scorer.scales)
+    np.save(os.path.join(tmp, 'numeric_coef.npy'), scorer.numeric_coef)
+    np.save(os.path.join(tmp, 'category_coef.npy'), np.concatenate(scorer.category_coef))
+    np.save(os.path.join(tmp, 'tenure_bins.npy'), scorer.tenure_bins)
+
+    # feature schema, vocabularies and library versions as JSON
+    offsets = np.cumsum([0] + [len(c) for c in scorer.category_coef]).tolist()
+    manifest = {
+        'format_version': ARRAY_FORMAT_VERSION,
+        'numeric_cols': scorer.numeric_cols,
+        'categorical_cols': scorer.categorical_cols,
+        'categories': [c.tolist() for c in scorer.categories],
+        'category_offsets': offsets,
+        'tenure_labels': scorer.tenure_labels,
+        'intercept': scorer.intercept,
+        'clip_tenure': scorer.clip_tenure,
+        'sklearn_version': sklearn.__version__,
+        'numpy_version': np.__version__,
+        **(extra or {})
+    }
+    with open(os.path.join(tmp, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    replace_directory(tmp, path)
+
+def replace_directory(tmp, path):
+    """
+    Publish the finished directory tmp at path in one atomic step.
+    path is a symlink to a versioned sibling directory (<path>.v<ns>), and
+    os.replace swaps the symlink, so a reader always finds either the old
+    or the new complete directory, never none. Versions older than the one
+    just replaced are removed; readers that already opened them keep their
+    files. A plain directory left by an earlier release is moved aside the
+    first time (the only swap with a short gap).
+    """
+    path = str(path).rstrip('/')
+    version = f"{path}.v{time.time_ns()}"
+    os.rename(tmp, version)
+
+    previous = os.path.realpath(path) if os.path.islink(path) else None
+    if previous is None and os.path.isdir(path):
+        os.rename(path, f"{path}.v0")
+        previous = os.path.realpath(f"{path}.v0")
+
+    # relative target, so the outputs directory can be moved as a whole
+    link = f"{path}.link-{os.getpid()}"
+    if os.path.lexists(link):
+        os.remove(link)
+    os.symlink(os.path.basename(version), link)
+    os.replace(link, path)
+
+    keep = {os.path.realpath(version), previous}
+    for old in glob.glob(glob.escape(path) + '.v*'):
+        if os.path.realpath(old) not in keep:
+            shutil.rmtree(old, ignore_errors=True)
+
+def remove_directory(path):
+    """
+    Remove a directory published by replace_directory, with its versions.
+    """
+    path = str(path).rstrip('/')
+    if os.path.islink(path):
+        os.remove(path)
+    elif os.path.isdir(path):
+        shutil.rmtree(path)
+    for old in glob.glob(glob.escape(path) + '.v*'):
+        shutil.rmtree(old, ignore_errors=True)
+
+def is_array_artifact(path) -> bool:
+    """
+    True when path is a directory written by save_array_artifact.
+    """
+    return os.path.isfile(os.path.join(str(path), MANIFEST))
+
+def load_array_artifact(path, mmap_mode='r'):
+    """
+    Open an array artifact directory.
+    Returns (CompiledScorer, manifest dict).
+    With mmap_mode='r' the arrays are memory-mapped, not read into memory.
+    """
+    # resolve the symlink once, so every file comes from the same version
+    path = os.path.realpath(str(path))
+    with open(os.path.join(path, MANIFEST)) as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != ARRAY_FORMAT_VERSION:
+        raise ValueError(f"unsupported array artifact format in {path}")
+
+    def load(name):
+        return np.load(os.path.join(path, name), mmap_mode=mmap_mode)
+
+    # split the concatenated category coefficients back per column (views, no copy)
+    category_coef = load('category_coef.npy')
+    offsets = manifest['category_offsets']
+    category_coef = [
+        category_coef[offsets[k]:offsets[k + 1]]
+        for k in range(len(offsets) - 1)
+    ]
+
+    scorer = CompiledScorer(
+        manifest['numeric_cols'], load('means.npy'), load('scales.npy'),
+        load('numeric_coef.npy'), manifest['categorical_cols'],
+        manifest['categories'], category_coef,
+        load('tenure_bins.npy'), manifest['tenure_labels'], manifest['intercept'],
+        clip_tenure=manifest.get('clip_tenure', False)
+    )
+    return scorer, manifest
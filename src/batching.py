@@ -0,0 +1,129 @@
+import asyncio
+import time
+from collections import Counter, deque
+
+import numpy as np
+
+from src.metrics import observe_stage
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single-customer requests into batched model calls.
+
+    Incoming samples are queued; the queue is flushed as one call to
+    predict_batch as soon as max_batch_size samples are waiting or the
+    oldest one has waited max_wait_ms. The model call runs in a worker
+    thread so the event loop keeps accepting requests, and every caller
+    gets its own result back through a future.
+    """
+    def __init__(self, predict_batch, max_batch_size=64, max_wait_ms=2.0,
+                 stats_window=10_000):
+        # callable: list of samples -> list of results in the same order
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+
+        # queue and flusher task are bound to the running event loop
+        self._loop = None
+        self._queue = None
+        self._worker = None
+
+        # statistics for tuning batch size against latency
+        self._batch_sizes = Counter()
+        self._waits = deque(maxlen=stats_window)
+        self._items = 0
+
+    def _ensure_started(self):
+        """
+        Start the flusher task on the current event loop if needed.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, sample):
+        """
+        Queue one sample and wait for its result.
+        """
+        self._ensure_started()
+        future = self._loop.create_future()
+        self._queue.put_nowait((sample, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        """
+        Wait for the first sample, then gather more until the batch is
+        full or the max wait has passed.
+        """
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            # take whatever is already queued without waiting
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            flushed_at = time.perf_counter()
+
+            # callers that went away don't need a result
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                continue
+
+            self._batch_sizes[len(batch)] += 1
+            self._items += len(batch)
+            for _, _, queued_at in batch:
+                self._waits.append(flushed_at - queued_at)
+                observe_stage('queue_wait', flushed_at - queued_at)
+
+            # one model call for the whole batch, off the event loop
+            try:
+                results = await asyncio.to_thread(
+                    self.predict_batch, [sample for sample, _, _ in batch]
+                )
+            except Exception as exc:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self) -> dict:
+        """
+        Batch-size and queue-wait statistics since startup
+        (queue waits over the most recent requests only).
+        """
+        batches = sum(self._batch_sizes.values())
+        waits_ms = np.array(self._waits) * 1000 if self._waits else np.zeros(1)
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'batches': batches,
+            'items': self._items,
+            'mean_batch_size': self._items / batches if batches else 0.0,
+            'batch_size_counts': dict(sorted(self._batch_sizes.items())),
+            'queue_wait_ms': {
+                'mean': float(waits_ms.mean()),
+                'p50': float(np.percentile(waits_ms, 50)),
+                'p99': float(np.percentile(waits_ms, 99)),
+                'max': float(waits_ms.max())
+            }
+        }
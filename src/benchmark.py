@@ -0,0 +1,291 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.metrics import roc_auc_score
+
+from src.config import DATA_PATH, OUTPUT_DIR
+from src.data import load_data, split_data
+from src.features import TenureBucket
+from src.model import build_pipeline, MODEL_BACKENDS
+
+# default location of the benchmark results
+BENCHMARK_PATH = os.path.join(OUTPUT_DIR, 'benchmark.json')
+
+NUMERIC_COLS = ['tenure', 'MonthlyCharges', 'TotalCharges']
+
+# rows of the synthetic copy used to compare the model backends at scale
+SCALE_ROWS = 200_000
+
+def _time_calls(func, repeat, warmup=3):
+    """
+    Call func repeat times after a few warm-up calls.
+    Returns the duration of each call in seconds.
+    """
+    for _ in range(warmup):
+        func()
+    times = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        times[i] = time.perf_counter() - start
+    return times
+
+def _metric(value, unit, higher_is_better=False):
+    return {'value': float(value), 'unit': unit, 'higher_is_better': higher_is_better}
+
+def _latency_metrics(prefix, times):
+    """
+    p50/p90/p99 latency in milliseconds from per-call durations.
+    """
+    ms = times * 1000
+    return {
+        f'{prefix}_p{q}_ms': _metric(np.percentile(ms, q), 'ms')
+        for q in (50, 90, 99)
+    }
+
+def bench_data(path, repeat):
+    """
+    Throughput of load_data and split_data on the raw CSV.
+    """
+    times = _time_calls(lambda: load_data(path), repeat, warmup=1)
+    df = load_data(path)
+    split_times = _time_calls(lambda: split_data(df), repeat, warmup=1)
+    return {
+        'load_data_rows_per_s': _metric(len(df) / np.median(times), 'rows/s', True),
+        'split_data_rows_per_s': _metric(len(df) / np.median(split_times), 'rows/s', True)
+    }
+
+def bench_tenure_bucket(X, repeat):
+    """
+    Throughput of TenureBucket.transform on the full feature frame, per mode.
+    """
+    results = {}
+    for mode in ('cut', 'codes'):
+        tb = TenureBucket(mode=mode).fit(X)
+        times = _time_calls(lambda: tb.transform(X), repeat)
+        results[f'tenure_bucket_{mode}_rows_per_s'] = _metric(
+            len(X) / np.median(times), 'rows/s', True
+        )
+    return results
+
+def _fit_pipeline(X_train, y_train, model='logreg'):
+    tb = TenureBucket(mode='codes')
+    X_tb = tb.fit_transform(X_train)
+    categorical_cols = [c for c in X_tb.columns if c not in NUMERIC_COLS]
+    pipeline = build_pipeline(categorical_cols, NUMERIC_COLS, model=model)
+    return pipeline.fit(X_tb, y_train), tb
+
+def bench_fit(X_train, y_train, repeat, model='logreg'):
+    """
+    Wall-clock time and peak traced memory of fitting the full pipeline.
+    """
+    times = _time_calls(lambda: _fit_pipeline(X_train, y_train, model), repeat, warmup=1)
+
+    # measure memory in a separate run, tracing slows the fit down
+    tracemalloc.start()
+    _fit_pipeline(X_train, y_train, model)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'fit_seconds': _metric(np.median(times), 's'),
+        'fit_peak_memory_mb': _metric(peak / 2**20, 'MB')
+    }
+
+def bench_predict(pipeline, tb, X, repeat, batch_size=1000):
+    """
+    Latency percentiles of single-record and batched predict_proba,
+    including the TenureBucket transform as in the inference path.
+    """
+    rng = np.random.default_rng(42)
+    rows = [X.iloc[[i]] for i in rng.integers(0, len(X), size=repeat)]
+    it = iter(rows * 2)
+    single = _time_calls(lambda: pipeline.predict_proba(tb.transform(next(it))), repeat)
+
+    batch = X.sample(n=min(batch_size, len(X)), replace=len(X) < batch_size, random_state=42)
+    batched = _time_calls(lambda: pipeline.predict_proba(tb.transform(batch)), max(repeat // 10, 5))
+
+    results = {}
+    results.update(_latency_metrics('predict_single', single))
+    results.update(_latency_metrics(f'predict_batch{len(batch)}', batched))
+    results['predict_batch_rows_per_s'] = _metric(
+        len(batch) / np.median(batched), 'rows/s', True
+    )
+    return results
+
+def bench_models(X_train, y_train, X_test, y_test, repeat, label):
+    """
+    Fit time, peak memory, scoring latency and test ROC-AUC of every
+    model backend on the same split, as models_<label>_<backend>_* metrics.
+    """
+    results = {}
+    for model in MODEL_BACKENDS:
+        print(f"  {model} on {label} ({len(X_train):,} training rows)...")
+        metrics = bench_fit(X_train, y_train, max(repeat // 40, 3), model)
+        pipeline, tb = _fit_pipeline(X_train, y_train, model)
+        metrics.update(bench_predict(pipeline, tb, X_test, repeat))
+        auc = roc_auc_score(y_test, pipeline.predict_proba(tb.transform(X_test))[:, 1])
+        metrics['roc_auc'] = _metric(auc, 'auc', True)
+        results.update({f'models_{label}_{model}_{name}': m for name, m in metrics.items()})
+    return results
+
+def _scaled_copy(df, rows, seed=42):
+    """
+    A synthetic copy of the real data with rows customers (src/synthetic.py),
+    cleaned like load_data.
+    """
+    from src.synthetic import SyntheticCustomers
+
+    sample = SyntheticCustomers(df).sample(rows, np.random.default_rng(seed))
+    # back from categoricals to the dtypes of the real data
+    sample = sample.astype({col: df[col].dtype for col in sample.columns if col != 'Churn'})
+    sample['Churn'] = (sample['Churn'] == 'Yes').astype(int)
+    return sample
+
+def bench_api(pipeline, tb, X, n_requests):
+    """
+    End-to-end /predict latency and throughput through FastAPI's in-process
+    test client, served by the pipeline trained in this run.
+    """
+    try:
+        from fastapi.testclient import TestClient
+    except ImportError:
+        print("Skipping API benchmark: fastapi test client not available")
+        return {}
+    from src.api import app
+    from src.inference import registry, router
+    from src.registry import LoadedModel
+
+    previous = registry.current()
+    registry.set_model(LoadedModel({'pipeline': pipeline, 'tenure_bucket': tb}, 'benchmark'))
+    payloads = X.sample(n=n_requests, replace=True, random_state=42).to_dict('records')
+
+    try:
+        with TestClient(app) as client:
+            # the startup watcher would swap the artifact on disk in for the
+            # benchmark model on its first poll
+            router.stop_watching()
+            it = iter(payloads * 2)
+            times = _time_calls(lambda: client.post('/predict', json=next(it)), n_requests)
+    finally:
+        registry.set_model(previous)
+
+    results = _latency_metrics('api_predict', times)
+    results['api_predict_requests_per_s'] = _metric(1 / times.mean(), 'req/s', True)
+    return results
+
+def run_benchmarks(data_path=DATA_PATH, quick=False, scale_rows=SCALE_ROWS):
+    """
+    Run the whole suite offline on the local CSV.
+    - scale_rows: size of the synthetic copy the model backends are also
+      compared on (0 to skip)
+    Returns a JSON-serializable dict with metadata and results.
+    """
+    repeat = 20 if quick else 200
+    np.random.seed(42)
+
+    df = load_data(data_path)
+    X_train, X_test, y_train, y_test = split_data(df)
+
+    results = {}
+    sections = [
+        ('data', lambda: bench_data(data_path, max(repeat // 20, 3))),
+        ('tenure_bucket', lambda: bench_tenure_bucket(X_train, repeat // 4)),
+        ('fit', lambda: bench_fit(X_train, y_train, max(repeat // 40, 3))),
+    ]
+    for name, bench in sections:
+        print(f"Benchmarking {name}...")
+        results.update(bench())
+
+    pipeline, tb = _fit_pipeline(X_train, y_train)
+    print("Benchmarking predict...")
+    results.update(bench_predict(pipeline, tb, X_test, repeat))
+    print("Benchmarking api...")
+    results.update(bench_api(pipeline, tb, X_test, repeat))
+
+    print("Benchmarking model backends...")
+    results.update(bench_models(X_train, y_train, X_test, y_test, repeat, 'real'))
+    if scale_rows:
+        S_train, S_test, s_train, s_test = split_data(_scaled_copy(df, scale_rows))
+        results.update(bench_models(S_train, s_train, S_test, s_test, repeat, 'synthetic'))
+
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0],
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'sklearn': sklearn.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'rows': len(df),
+            'scale_rows': scale_rows,
+            'quick': quick
+        },
+        'results': results
+    }
+
+def compare(current, baseline, tolerance=0.2):
+    """
+    Flag metrics that got worse than the baseline by more than tolerance
+    (a fraction, 0.2 = 20%). Returns a list of regression descriptions.
+    """
+    regressions = []
+    for name, base in baseline['results'].items():
+        cur = current['results'].get(name)
+        if cur is None or base['value'] == 0:
+            continue
+        change = (cur['value'] - base['value']) / base['value']
+        worse = -change if base['higher_is_better'] else change
+        status = 'REGRESSION' if worse > tolerance else 'ok'
+        print(f"{name:<36} {base['value']:>12.4g} -> {cur['value']:>12.4g} "
+              f"{cur['unit']:<7} {change:+7.1%}  {status}")
+        if worse > tolerance:
+            regressions.append(f"{name}: {base['value']:.4g} -> {cur['value']:.4g} {cur['unit']}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark data loading, training and inference."
+    )
+    parser.add_argument('--data', default=DATA_PATH, help="raw customer CSV")
+    parser.add_argument('--output', default=BENCHMARK_PATH,
+                        help="where to write the JSON results")
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help="JSON results of an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="allowed relative slowdown before flagging a regression")
+    parser.add_argument('--quick', action='store_true',
+                        help="fewer repetitions, for a fast sanity check")
+    parser.add_argument('--scale', type=int, default=SCALE_ROWS,
+                        help="rows of the synthetic copy to compare the model backends on (0 to skip)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.data, quick=args.quick, scale_rows=args.scale)
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Benchmark results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+    else:
+        for name, m in report['results'].items():
+            print(f"{name:<36} {m['value']:>12.4g} {m['unit']}")
+
+if __name__ == '__main__':
+    main()
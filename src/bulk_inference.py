@@ -0,0 +1,183 @@
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from src.config import DATA_PATH, ARTIFACT_PATH, SCORES_PATH, BULK_CHUNKSIZE
+from src.data import clean_data
+from src.registry import load_model
+
+# model loaded once per worker process by _init_worker
+_worker_model = None
+
+def _init_worker(artifact_path):
+    """
+    Load the saved pipeline and transformer once per worker process.
+    """
+    global _worker_model
+    _worker_model = load_model(artifact_path)
+
+def score_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    Clean one raw input chunk and score it.
+    Returns a DataFrame with customerID, churn_probability and churn_prediction.
+    """
+    # same cleaning as load_data, but fill TotalCharges with the training mean
+    # so the result doesn't depend on how the input is chunked
+    df = clean_data(chunk, _worker_model.artifacts.get('total_charges_mean'))
+
+    # raw features -> tenure bucket -> churn probability
+    X = df.drop(columns=['customerID', 'Churn'], errors='ignore')
+    proba = _worker_model.predict_proba(X)
+
+    # fall back to the input row number when the file has no customerID
+    ids = df['customerID'].to_numpy() if 'customerID' in df.columns else df.index.to_numpy()
+
+    return pd.DataFrame({
+        'customerID': ids,
+        'churn_probability': proba,
+        'churn_prediction': (proba >= 0.5).astype(int)
+    })
+
+def iter_chunks(path, chunksize):
+    """
+    Yield the input CSV or Parquet file as DataFrames of at most chunksize rows.
+    """
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+def _read_checkpoint(path, input_path, chunksize):
+    """
+    Return the saved progress for this input and chunk size, or None.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        state = json.load(f)
+    if state.get('input') != input_path or state.get('chunksize') != chunksize:
+        return None
+    return state
+
+def _write_checkpoint(path, state):
+    """
+    Atomically replace the checkpoint file.
+    """
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+def run_bulk_inference(input_path=DATA_PATH, output_path=SCORES_PATH,
+                       artifact_path=ARTIFACT_PATH, chunksize=BULK_CHUNKSIZE,
+                       workers=None, resume=False):
+    """
+    Score every customer in input_path and stream the results to output_path.
+    - input_path: raw customer data, CSV or Parquet
+    - output_path: CSV file for the scores
+    - artifact_path: artifacts saved by run_serve
+    - chunksize: number of input rows scored at a time
+    - workers: number of scoring processes, defaults to the CPU count
+    - resume: continue after the last completed chunk of a previous run
+    Memory stays bounded: at most two chunks per worker are in flight.
+    Returns a dict with rows scored, elapsed seconds and rows per second.
+    """
+    workers = workers or os.cpu_count() or 1
+    checkpoint_path = output_path + '.progress.json'
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+
+    # pick up where the last run stopped, dropping any half-written chunk
+    state = _read_checkpoint(checkpoint_path, input_path, chunksize) if resume else None
+    if state is not None and not os.path.exists(output_path):
+        state = None
+    if state is None:
+        state = {'input': input_path, 'chunksize': chunksize,
+                 'chunks_done': 0, 'rows_written': 0, 'bytes': 0}
+        open(output_path, 'w').close()
+    else:
+        with open(output_path, 'r+') as f:
+            f.truncate(state['bytes'])
+        print(f"Resuming after chunk {state['chunks_done']} "
+              f"({state['rows_written']:,} rows already scored)")
+
+    start = time.perf_counter()
+    rows_scored = 0
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(artifact_path,)) as pool, \
+            open(output_path, 'a', newline='') as out:
+
+        pending = deque()
+
+        def write_next():
+            nonlocal rows_scored
+            # results are written in input order
+            scores = pending.popleft().result()
+            scores.to_csv(out, header=state['bytes'] == 0, index=False)
+            out.flush()
+            os.fsync(out.fileno())
+
+            # record progress only after the chunk is safely on disk
+            state['chunks_done'] += 1
+            state['rows_written'] += len(scores)
+            state['bytes'] = out.tell()
+            _write_checkpoint(checkpoint_path, state)
+
+            rows_scored += len(scores)
+            rate = rows_scored / (time.perf_counter() - start)
+            print(f"chunk {state['chunks_done']}: {state['rows_written']:,} rows "
+                  f"({rate:,.0f} rows/s)")
+
+        for i, chunk in enumerate(iter_chunks(input_path, chunksize)):
+            # skip chunks completed by a previous run
+            if i < state['chunks_done']:
+                continue
+            pending.append(pool.submit(score_chunk, chunk))
+            # keep the number of chunks in memory bounded
+            if len(pending) >= 2 * workers:
+                write_next()
+
+        while pending:
+            write_next()
+
+    elapsed = time.perf_counter() - start
+    rate = rows_scored / elapsed if elapsed > 0 else 0.0
+
+    # the run is complete, a later run starts from scratch
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    print(f"Scored {rows_scored:,} rows in {elapsed:.1f}s ({rate:,.0f} rows/s), "
+          f"saved to {output_path}")
+    return {'rows': rows_scored, 'seconds': elapsed, 'rows_per_second': rate}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Score all customers in a CSV or Parquet file in chunks."
+    )
+    parser.add_argument('--input', default=DATA_PATH,
+                        help="raw customer data (.csv or .parquet)")
+    parser.add_argument('--output', default=SCORES_PATH,
+                        help="CSV file for the churn scores")
+    parser.add_argument('--artifacts', default=ARTIFACT_PATH,
+                        help="model artifacts saved by run_serve")
+    parser.add_argument('--chunksize', type=int, default=BULK_CHUNKSIZE,
+                        help="rows scored per chunk")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="scoring processes (default: all CPU cores)")
+    parser.add_argument('--resume', action='store_true',
+                        help="continue after the last completed chunk")
+    args = parser.parse_args(argv)
+
+    run_bulk_inference(args.input, args.output, args.artifacts,
+                       args.chunksize, args.workers, args.resume)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+def cache_key(sample: dict) -> str:
+    """
+    Canonical hash of a validated customer payload:
+    the same field values always give the same key, whatever the key order.
+    """
+    canonical = json.dumps(sample, sort_keys=True, separators=(',', ':'))
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+class PredictionCache:
+    """
+    Bounded, thread-safe LRU cache of prediction results with a TTL.
+
+    Entries are tagged with the model version they were computed with;
+    the whole cache is dropped as soon as a different version is seen,
+    so a reloaded artifact never serves stale scores.
+    """
+    def __init__(self, max_size=10_000, ttl=300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+
+        # counters to check the cache is paying off
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _check_version(self, version):
+        # called with the lock held
+        if version != self._version:
+            if self._data:
+                self.invalidations += 1
+            self._data.clear()
+            self._version = version
+
+    def get(self, key, version):
+        """
+        Return the cached result for key, or None on a miss.
+        """
+        with self._lock:
+            self._check_version(version)
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            result, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            # most recently used goes to the end
+            self._data.move_to_end(key)
+            self.hits += 1
+            return dict(result)
+
+    def put(self, key, version, result):
+        """
+        Store a result, evicting the least recently used entries when full.
+        """
+        with self._lock:
+            self._check_version(version)
+            self._data[key] = (dict(result), time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
@@ -0,0 +1,172 @@
+import argparse
+import json
+import subprocess
+import sys
+
+from src.config import DATA_PATH, IMPORT_TIME_BUDGET, PLOT_WORKERS, STAGE_WORKERS
+
+# libraries only the EDA plots and the SHAP summary plots need
+PLOTTING_MODULES = ('shap', 'matplotlib', 'seaborn', 'missingno', 'plotly', 'kaleido')
+
+# modules that must import without the plotting stack and within the time budget:
+# the scoring API, bulk scoring, and the CLI / workflow entry points themselves
+LIGHT_MODULES = ('src.api', 'src.bulk_inference', 'src.cli', 'src.main')
+
+# run in a fresh interpreter: time one import and list the plotting modules it loaded
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+loaded = sorted({{name.split('.')[0] for name in sys.modules}} & set({plotting!r}))
+print(json.dumps({{'seconds': seconds, 'plotting': loaded}}))
+"""
+
+def check_imports(modules=LIGHT_MODULES, budget=IMPORT_TIME_BUDGET, repeat=3) -> bool:
+    """
+    Import each module in a fresh interpreter and check that it loads none
+    of the plotting libraries and takes at most budget seconds
+    (best of repeat runs, to ignore a cold disk cache).
+    Prints one line per module and returns True when all pass.
+    """
+    ok = True
+    print(f"{'module':<22} {'seconds':>8}  result")
+    for module in modules:
+        runs = []
+        for _ in range(repeat):
+            out = subprocess.run(
+                [sys.executable, '-c', _IMPORT_PROBE.format(module=module, plotting=PLOTTING_MODULES)],
+                capture_output=True, text=True, check=True
+            )
+            runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+        seconds = min(run['seconds'] for run in runs)
+        plotting = sorted(set().union(*(run['plotting'] for run in runs)))
+
+        problems = []
+        if plotting:
+            problems.append(f"imports {', '.join(plotting)}")
+        if seconds > budget:
+            problems.append(f"over the {budget:.2f}s budget")
+        ok = ok and not problems
+        print(f"{module:<22} {seconds:8.3f}  {'; '.join(problems) or 'ok'}")
+    return ok
+
+def _run_stages(targets, args, **params):
+    from src.main import STAGES, run_workflow
+
+    # command-line overrides of stage parameters
+    for stage in STAGES:
+        for key, value in params.items():
+            if value is not None and key in stage.params:
+                stage.params[key] = value
+    force = ['all'] if args.force_all else targets if args.force else []
+    run_workflow(targets=targets, force=force, workers=args.workers)
+
+def cmd_eda(args):
+    from src.data import load_eda_data
+    from src.plot_runner import run_plots
+
+    run_plots(load_eda_data(args.data), force=args.force, workers=args.plot_workers)
+
+def cmd_train(args):
+    # cross validation, final fit and test-set evaluation
+    _run_stages(['cv', 'evaluate'], args)
+
+def cmd_tune(args):
+    _run_stages(['evaluate_tuned'], args, method=args.method, time_budget=args.time_budget)
+
+def cmd_explain(args):
+    _run_stages(['explain'], args)
+
+def cmd_serve_artifacts(args):
+    _run_stages(['serve'], args)
+
+def cmd_feature_store(args):
+    _run_stages(['feature_store'], args)
+
+def cmd_score(args):
+    from src.bulk_inference import main as bulk_main
+
+    # same options as python -m src.bulk_inference
+    bulk_main(args.options)
+
+def cmd_incremental(args):
+    from src.incremental import main as incremental_main
+
+    # same options as python -m src.incremental
+    incremental_main(args.options)
+
+def cmd_check_imports(args):
+    if not check_imports(budget=args.budget):
+        sys.exit(1)
+
+def _stage_options(parser):
+    parser.add_argument('--force', action='store_true',
+                        help="recompute this command's stages even if cached")
+    parser.add_argument('--force-all', action='store_true',
+                        help="recompute every stage it depends on")
+    parser.add_argument('--workers', type=int, default=STAGE_WORKERS,
+                        help="stages that may run at the same time")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m src.cli',
+        description="Customer churn forecaster: run one part of the workflow"
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    eda = commands.add_parser('eda', help="render the EDA plots")
+    eda.add_argument('--data', default=DATA_PATH, help="raw CSV")
+    eda.add_argument('--force', action='store_true', help="re-render every plot")
+    eda.add_argument('--plot-workers', type=int, default=PLOT_WORKERS,
+                     help="plot worker processes")
+    eda.set_defaults(func=cmd_eda)
+
+    train = commands.add_parser('train', help="cross-validate, fit and evaluate the model")
+    _stage_options(train)
+    train.set_defaults(func=cmd_train)
+
+    tune = commands.add_parser('tune', help="tune hyperparameters and evaluate the best model")
+    _stage_options(tune)
+    tune.add_argument('--method', choices=['path', 'halving', 'random'], default=None)
+    tune.add_argument('--time-budget', type=float, default=None, help="seconds")
+    tune.set_defaults(func=cmd_tune)
+
+    explain = commands.add_parser('explain', help="SHAP plots and explainer parity check")
+    _stage_options(explain)
+    explain.set_defaults(func=cmd_explain)
+
+    serve = commands.add_parser('serve-artifacts', help="save the model artifacts for the API")
+    _stage_options(serve)
+    serve.set_defaults(func=cmd_serve_artifacts)
+
+    store = commands.add_parser('feature-store',
+                                help="build the per-customer score lookup for the API")
+    _stage_options(store)
+    store.set_defaults(func=cmd_feature_store)
+
+    # every option is passed on to python -m src.bulk_inference (see score --help)
+    score = commands.add_parser('score', help="bulk-score a CSV or Parquet file",
+                                add_help=False)
+    score.set_defaults(func=cmd_score)
+
+    # every option is passed on to python -m src.incremental (see incremental --help)
+    incremental = commands.add_parser('incremental', add_help=False,
+                                      help="train or update the model over chunked data with SGD")
+    incremental.set_defaults(func=cmd_incremental)
+
+    check = commands.add_parser('check-imports',
+                                help="check that scoring never imports the plotting stack")
+    check.add_argument('--budget', type=float, default=IMPORT_TIME_BUDGET,
+                       help="maximum import time per module in seconds")
+    check.set_defaults(func=cmd_check_imports)
+
+    args, rest = parser.parse_known_args(argv)
+    if args.command in ('score', 'incremental'):
+        args.options = rest
+    elif rest:
+        parser.error(f"unrecognized arguments: {' '.join(rest)}")
+    args.func(args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+import math
+import numpy as np
+
+class CompiledScorer:
+    """
+    Pure-NumPy churn scorer compiled from a fitted
+    StandardScaler + OneHotEncoder + LogisticRegression pipeline.
+
+    Scoring skips pandas, pd.cut and the sklearn Pipeline machinery:
+    numeric features are scaled with the stored means and scales,
+    every categorical value is a lookup into a per-column coefficient table
+    and the tenure bucket is found with np.searchsorted on the bin edges.
+    """
+    def __init__(self, numeric_cols, means, scales, numeric_coef,
+                 categorical_cols, categories, category_coef,
+                 tenure_bins, tenure_labels, intercept, clip_tenure=False):
+        # numeric features: scaler statistics and matching coefficients
+        self.numeric_cols = list(numeric_cols)
+        self.means = np.asarray(means, dtype=float)
+        self.scales = np.asarray(scales, dtype=float)
+        self.numeric_coef = np.asarray(numeric_coef, dtype=float)
+
+        # categorical features: sorted vocabulary and coefficient per category
+        self.categorical_cols = list(categorical_cols)
+        # strings are kept as object arrays, like OneHotEncoder.categories_
+        self.categories = [
+            np.asarray(c, dtype=object) if np.asarray(c).dtype.kind == 'U' else np.asarray(c)
+            for c in categories
+        ]
+        self.category_coef = [np.asarray(c, dtype=float) for c in category_coef]
+
+        # dict lookup tables for the single-record path
+        self._tables = [
+            (col, dict(zip(cats.tolist(), coef.tolist())))
+            for col, cats, coef in zip(
+                self.categorical_cols, self.categories, self.category_coef
+            )
+            if col != 'TenureBucket'
+        ]
+
+        # tenure bucket edges and the coefficient of each bucket
+        self.tenure_bins = np.asarray(tenure_bins, dtype=float)
+        self.tenure_labels = list(tenure_labels)
+        # TenureBucket(mode='codes') clips tenure into the first/last bucket
+        self.clip_tenure = bool(clip_tenure)
+        self.tenure_coef = self._bucket_coef()
+
+        self.intercept = float(intercept)
+
+    def _bucket_coef(self):
+        """
+        Coefficient of each tenure bucket, 0 for buckets the encoder never saw.
+        """
+        if 'TenureBucket' not in self.categorical_cols:
+            return np.zeros(len(self.tenure_labels))
+        k = self.categorical_cols.index('TenureBucket')
+        table = dict(zip(self.categories[k].tolist(), self.category_coef[k].tolist()))
+        return np.array([table.get(label, 0.0) for label in self.tenure_labels])
+
+    def _bucket_index(self, tenure):
+        """
+        Bucket index per tenure value, matching the TenureBucket mode:
+        pd.cut(include_lowest=True), where values outside the edges get -1,
+        or clipped into the first and last bucket.
+        """
+        tenure = np.asarray(tenure, dtype=float)
+        idx = np.searchsorted(self.tenure_bins, tenure, side='left') - 1
+        if self.clip_tenure:
+            idx = np.clip(idx, 0, len(self.tenure_coef) - 1)
+            return np.where(np.isnan(tenure), -1, idx)
+        # include_lowest: the first edge belongs to the first bucket
+        idx = np.where(tenure == self.tenure_bins[0], 0, idx)
+        inside = (idx >= 0) & (idx < len(self.tenure_coef))
+        return np.where(inside, idx, -1)
+
+    def predict_one(self, sample: dict) -> float:
+        """
+        sample: a dict of raw feature values
+        returns: churn probability
+        """
+        z = self.intercept
+
+        # scaled numeric features
+        for j, col in enumerate(self.numeric_cols):
+            z += (sample[col] - self.means[j]) / self.scales[j] * self.numeric_coef[j]
+
+        # one lookup per categorical column, unknown categories add nothing
+        for col, table in self._tables:
+            z += table.get(sample[col], 0.0)
+
+        # tenure bucket
+        i = int(self._bucket_index(sample['tenure']))
+        if i >= 0:
+            z += self.tenure_coef[i]
+
+        return 1.0 / (1.0 + math.exp(-z))
+
+    def predict_batch(self, columns) -> np.ndarray:
+        """
+        columns: anything indexable by column name that returns an array,
+        e.g. a NumPy record array, a dict of arrays or a DataFrame
+        returns: array of churn probabilities in row order
+        """
+        # scaled numeric features -> one dot product
+        X_num = np.column_stack([
+            np.asarray(columns[col], dtype=float) for col in self.numeric_cols
+        ])
+        z = ((X_num - self.means) / self.scales) @ self.numeric_coef + self.intercept
+
+        # vectorized lookup per categorical column
+        for col, cats, coef in zip(self.categorical_cols, self.categories, self.category_coef):
+            if col == 'TenureBucket':
+                continue
+            z += _lookup(cats, coef, columns[col])
+
+        # tenure bucket
+        idx = self._bucket_index(columns['tenure'])
+        z += np.where(idx >= 0, self.tenure_coef[np.maximum(idx, 0)], 0.0)
+
+        return 1.0 / (1.0 + np.exp(-z))
+
+    def predict_records(self, samples: list) -> np.ndarray:
+        """
+        samples: a list of dicts of raw feature values
+        returns: array of churn probabilities in input order
+        """
+        columns = {
+            col: np.array([s[col] for s in samples])
+            for col in self.numeric_cols + self.categorical_cols + ['tenure']
+            if col != 'TenureBucket'
+        }
+        return self.predict_batch(columns)
+
+def _lookup(cats, coef, values):
+    """
+    Map each value to the coefficient of its category, 0 when unknown.
+    """
+    values = np.asarray(values)
+    # compare strings natively instead of as Python objects
+    if cats.dtype == object and values.dtype.kind in 'US':
+        cats = cats.astype(values.dtype.kind)
+    idx = np.minimum(np.searchsorted(cats, values), len(cats) - 1)
+    hit = cats[idx] == values
+    return np.where(hit, coef[idx], 0.0)
+
+def compile_pipeline(pipeline, tenure_bucket) -> CompiledScorer:
+    """
+    Build a CompiledScorer from the fitted pipeline and tenure bucket
+    transformer saved by run_serve.
+    Raises ValueError when the pipeline is not scaler + one-hot + linear.
+    """
+    preproc = pipeline.named_steps['preproc']
+    clf = pipeline.named_steps['clf']
+    if not hasattr(clf, 'coef_') or clf.coef_.shape[0] != 1:
+        raise ValueError("only binary linear classifiers can be compiled")
+
+    coef = clf.coef_[0]
+    parts = {}
+    for name, trans, cols in preproc.transformers_:
+        if name == 'remainder':
+            if trans != 'drop':
+                raise ValueError("remainder columns cannot be compiled")
+            continue
+        # the last step of each sub-pipeline holds the fitted statistics
+        step = trans.steps[-1][1] if hasattr(trans, 'steps') else trans
+        parts[name] = (step, list(cols), coef[preproc.output_indices_[name]])
+
+    # numeric block: StandardScaler
+    scaler, numeric_cols, numeric_coef = parts['num']
+    means = scaler.mean_ if scaler.mean_ is not None else np.zeros(len(numeric_cols))
+    scales = scaler.scale_ if scaler.scale_ is not None else np.ones(len(numeric_cols))
+
+    # categorical block: OneHotEncoder, split its coefficients per column
+    ohe, categorical_cols, cat_coef = parts['cat']
+    if getattr(ohe, 'drop_idx_', None) is not None:
+        raise ValueError("one-hot encoders with dropped categories cannot be compiled")
+    category_coef, start = [], 0
+    for cats in ohe.categories_:
+        category_coef.append(cat_coef[start:start + len(cats)])
+        start += len(cats)
+
+    return CompiledScorer(
+        numeric_cols, means, scales, numeric_coef,
+        categorical_cols, ohe.categories_, category_coef,
+        tenure_bucket.bins, tenure_bucket.bucket_labels(), clf.intercept_[0],
+        clip_tenure=tenure_bucket.mode == 'codes'
+    )
+
+def check_parity(scorer, pipeline, tenure_bucket, X, atol=1e-9) -> float:
+    """
+    Compare the compiled scorer against pipeline.predict_proba on raw features X.
+    Raises ValueError when any probability differs by more than atol.
+    Returns the largest absolute difference.
+    """
+    expected = pipeline.predict_proba(tenure_bucket.transform(X))[:, 1]
+    batch = scorer.predict_batch(X)
+    single = np.array([scorer.predict_one(row) for row in X.to_dict('records')])
+
+    max_diff = float(max(np.abs(batch - expected).max(), np.abs(single - expected).max()))
+    if max_diff > atol:
+        raise ValueError(f"compiled scorer differs from pipeline by {max_diff:.3g}")
+    return max_diff
@@ -1,5 +1,4 @@
 import os
-import plotly.express as px
 
 # path to the folder containing the raw data CSV
 data_dir = 'data'
@@ -10,6 +9,115 @@ DATA_PATH = os.path.join(data_dir, 'telco-customer-churn.csv')
 # folder where all output files (plots, artifacts, scores) will be saved
 OUTPUT_DIR = 'outputs/'
 
+# cleaned datasets cached as Parquet, keyed on the hash of the source file
+CACHE_DIR = os.path.join(OUTPUT_DIR, 'cache')
+
+# trained pipeline and transformers saved by run_serve
+ARTIFACT_PATH = os.path.join(OUTPUT_DIR, 'churn_model_artifacts.pkl')
+
+# the same model as raw .npy arrays plus a JSON manifest, memory-mappable by workers
+ARRAY_ARTIFACT_PATH = os.path.join(OUTPUT_DIR, 'churn_model_arrays')
+
+# which artifact inference loads: 'auto' (arrays when present, else the pickle),
+# 'arrays' or 'pickle'
+ARTIFACT_FORMAT = os.environ.get('CHURN_ARTIFACT_FORMAT', 'auto')
+
+# churn probabilities written by the bulk scoring job
+SCORES_PATH = os.path.join(OUTPUT_DIR, 'churn_scores.csv')
+
+# seconds between checks for a new model artifact in the API, 0 disables reloading
+MODEL_RELOAD_INTERVAL = float(os.environ.get('CHURN_MODEL_RELOAD_INTERVAL', '5'))
+
+# more model versions served next to the primary artifact (src/routing.py), as
+# name=path pairs, e.g. CHURN_MODEL_VERSIONS=candidate=outputs/candidate.pkl
+# (kept as text here and parsed by src/inference.py, so a typo only stops the API)
+MODEL_VERSIONS = os.environ.get('CHURN_MODEL_VERSIONS', '')
+# versions that score every primary batch in the background for comparison,
+# e.g. CHURN_SHADOW_MODELS=candidate
+SHADOW_MODELS = [name for name in os.environ.get('CHURN_SHADOW_MODELS', '').split(',') if name]
+# share of requests (percent) routed to a version instead of the primary,
+# e.g. CHURN_ROUTE_PERCENT=candidate=10 (parsed like CHURN_MODEL_VERSIONS)
+ROUTE_PERCENT = os.environ.get('CHURN_ROUTE_PERCENT', '')
+# shadow batches allowed to wait; beyond that they are dropped, never slowing requests
+SHADOW_MAX_PENDING = int(os.environ.get('CHURN_SHADOW_MAX_PENDING', '64'))
+
+# optional LRU/TTL cache of predictions in src/inference.py
+# (set CHURN_PREDICTION_CACHE=1 when the same customers are rescored often)
+PREDICTION_CACHE = os.environ.get('CHURN_PREDICTION_CACHE', '0') == '1'
+CACHE_MAX_SIZE = int(os.environ.get('CHURN_CACHE_MAX_SIZE', '10000'))
+CACHE_TTL_SECONDS = float(os.environ.get('CHURN_CACHE_TTL_SECONDS', '300'))
+
+# per-stage latency and batch-size histograms, served on /metrics
+# (set CHURN_METRICS=0 to turn the instrumentation off completely)
+METRICS_ENABLED = os.environ.get('CHURN_METRICS', '1') == '1'
+
+# micro-batching of concurrent /predict calls in src/api.py
+# (set CHURN_MICRO_BATCHING=0 to score every request on its own)
+MICRO_BATCHING = os.environ.get('CHURN_MICRO_BATCHING', '1') == '1'
+# flush a batch once this many customers are waiting...
+BATCH_MAX_SIZE = int(os.environ.get('CHURN_BATCH_MAX_SIZE', '64'))
+# ...or once the oldest one has waited this many milliseconds
+BATCH_MAX_WAIT_MS = float(os.environ.get('CHURN_BATCH_MAX_WAIT_MS', '2'))
+
+# /predict/stream: customers scored per micro-batch, and the longest accepted NDJSON line
+STREAM_BATCH_SIZE = int(os.environ.get('CHURN_STREAM_BATCH_SIZE', '256'))
+STREAM_MAX_LINE_BYTES = int(os.environ.get('CHURN_STREAM_MAX_LINE_BYTES', str(64 * 1024)))
+
+# default number of features returned per customer by /explain
+EXPLAIN_TOP_K = int(os.environ.get('CHURN_EXPLAIN_TOP_K', '5'))
+
+# per-customer feature store behind GET /customers/* (src/feature_store.py), and
+# the columns whose "most at risk" top-K lists are precomputed
+FEATURE_STORE_PATH = os.path.join(OUTPUT_DIR, 'feature_store')
+FEATURE_STORE_SEGMENTS = os.environ.get(
+    'CHURN_FEATURE_STORE_SEGMENTS', 'Contract,PaymentMethod,InternetService'
+).split(',')
+
+# number of input rows read and scored at a time by the bulk scoring job
+BULK_CHUNKSIZE = 50_000
+
+# classifier behind the preprocessing in src/model.py:
+# 'logreg' (one-hot + LogisticRegression) or 'hgb' (HistGradientBoostingClassifier)
+MODEL_BACKEND = os.environ.get('CHURN_MODEL', 'logreg')
+
+# out-of-core training in src/incremental.py: SGD passes over the data and the
+# share of customers (by customerID hash) kept out for the holdout ROC-AUC
+INCREMENTAL_EPOCHS = int(os.environ.get('CHURN_INCREMENTAL_EPOCHS', '5'))
+INCREMENTAL_HOLDOUT = float(os.environ.get('CHURN_INCREMENTAL_HOLDOUT', '0.2'))
+# constant SGD step size of `incremental update`, small so the saved model is refined
+# rather than retrained from the new rows alone
+INCREMENTAL_UPDATE_ETA0 = float(os.environ.get('CHURN_INCREMENTAL_UPDATE_ETA0', '0.01'))
+
+# on-disk limit for the preprocessing cache shared by CV folds and tuning candidates
+# (the cache lives in a temporary directory that is removed after the run)
+PREPROC_CACHE_MAX_BYTES = int(os.environ.get('CHURN_PREPROC_CACHE_MAX_BYTES', str(512 * 1024 ** 2)))
+
+# worker processes for the cross-validation folds (-1 = all cores)
+CV_N_JOBS = int(os.environ.get('CHURN_CV_N_JOBS', '-1'))
+# bootstrap resamples behind the test-set confidence intervals in src/evaluate.py
+BOOTSTRAP_RESAMPLES = int(os.environ.get('CHURN_BOOTSTRAP_RESAMPLES', '2000'))
+
+# stages of the src/main.py workflow that may run at the same time
+STAGE_WORKERS = int(os.environ.get('CHURN_STAGE_WORKERS', '4'))
+
+# maximum seconds to import the API, bulk scoring and CLI modules,
+# checked by `python -m src.cli check-imports`
+IMPORT_TIME_BUDGET = float(os.environ.get('CHURN_IMPORT_TIME_BUDGET', '3'))
+
+# hyperparameter search in src/main.py: 'path', 'halving' or 'random'
+# (see src/tuning.py), with an optional wall-clock budget in seconds
+TUNING_METHOD = os.environ.get('CHURN_TUNING_METHOD', 'path')
+TUNING_TIME_BUDGET = float(os.environ['CHURN_TUNING_TIME_BUDGET']) if os.environ.get('CHURN_TUNING_TIME_BUDGET') else None
+
+# opt-in switch for the pure-NumPy compiled scorer in src/inference.py
+# (set CHURN_COMPILED_SCORER=1 to skip pandas and the sklearn Pipeline at inference)
+COMPILED_SCORER = os.environ.get('CHURN_COMPILED_SCORER', '0') == '1'
+
+# worker processes rendering the EDA plots in src/plot_runner.py
+PLOT_WORKERS = int(os.environ.get('CHURN_PLOT_WORKERS', str(os.cpu_count() or 1)))
+# re-render every plot even when its inputs and settings are unchanged
+PLOT_FORCE = os.environ.get('CHURN_PLOT_FORCE', '0') == '1'
+
 # configuration for all plots in the project
 PLOT_CONFIG = {
     # settings for pie and donut charts
@@ -19,7 +127,14 @@ PLOT_CONFIG = {
         'font_size': 14, # size of text inside pie
         'width': 800, # plot width in pixels
         'height': 400, # plot height in pixels
-        'color_sequence': px.colors.qualitative.Pastel # list of pastel colors
+        # list of pastel colors (plotly's px.colors.qualitative.Pastel, copied
+        # here so importing the config never loads plotly)
+        'color_sequence': [
+            'rgb(102, 197, 204)', 'rgb(246, 207, 113)', 'rgb(248, 156, 116)',
+            'rgb(220, 176, 242)', 'rgb(135, 197, 95)', 'rgb(158, 185, 243)',
+            'rgb(254, 136, 177)', 'rgb(201, 219, 116)', 'rgb(139, 224, 164)',
+            'rgb(180, 151, 231)', 'rgb(179, 179, 179)'
+        ]
     },
 
     # settings for histograms and bar charts
@@ -27,7 +142,13 @@ PLOT_CONFIG = {
         'width': 700, # plot width in pixels
         'height': 500, # plot height in pixels
         'bargap': 0.15, # gap between bars (0 to 1)
-        'color_sequence': px.colors.qualitative.Set3 # list of soft pastel colors
+        # list of soft pastel colors (plotly's px.colors.qualitative.Set3)
+        'color_sequence': [
+            'rgb(141,211,199)', 'rgb(255,255,179)', 'rgb(190,186,218)',
+            'rgb(251,128,114)', 'rgb(128,177,211)', 'rgb(253,180,98)',
+            'rgb(179,222,105)', 'rgb(252,205,229)', 'rgb(217,217,217)',
+            'rgb(188,128,189)', 'rgb(204,235,197)', 'rgb(255,237,111)'
+        ]
     },
 
     # color pairs for kernel density plots by churn status
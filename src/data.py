@@ -1,27 +1,109 @@
+import hashlib
+import os
+
 import pandas as pd
 from sklearn.model_selection import train_test_split
 
-def load_data(path: str):
+from src.config import CACHE_DIR
+
+# low-cardinality string columns, stored as pandas categoricals
+CATEGORICAL_COLS = [
+    'gender', 'Partner', 'Dependents', 'PhoneService', 'MultipleLines',
+    'InternetService', 'OnlineSecurity', 'OnlineBackup', 'DeviceProtection',
+    'TechSupport', 'StreamingTV', 'StreamingMovies', 'Contract',
+    'PaperlessBilling', 'PaymentMethod', 'Churn'
+]
+
+# explicit schema of the raw CSV: categoricals and downcast integers.
+# TotalCharges is parsed in clean_data because it contains blanks, and the
+# charges stay float64 so scaling happens in double precision
+RAW_DTYPES = {
+    **{col: 'category' for col in CATEGORICAL_COLS},
+    'customerID': 'string',
+    'SeniorCitizen': 'int8',
+    'tenure': 'int16',
+    'MonthlyCharges': 'float64'
+}
+
+# bump when the cleaning logic changes, so old cached files are not reused
+CLEAN_CACHE_VERSION = 1
+
+def clean_data(df, fill_value=None):
     """
-    Load the dataset from CSV, clean and encode it for modeling.
+    Clean a raw customer frame for modeling or scoring.
+    - df: raw DataFrame as read from CSV or Parquet
+    - fill_value: value for missing TotalCharges, defaults to the column mean
+    The Churn column is encoded only when present, so unlabeled
+    scoring data goes through the same cleaning as training data.
     """
-    # read raw data from CSV
-    df = pd.read_csv(path)
-
     # convert TotalCharges to numeric, invalid parsing becomes NaN
     df['TotalCharges'] = pd.to_numeric(df['TotalCharges'], errors='coerce')
 
     # remove rows where tenure is zero
     df = df[df['tenure'] > 0].copy()
 
-    # fill missing TotalCharges with the column mean
-    df['TotalCharges'] = df['TotalCharges'].fillna(df['TotalCharges'].mean())
+    # fill missing TotalCharges with the given value or the column mean
+    if fill_value is None:
+        fill_value = df['TotalCharges'].mean()
+    df['TotalCharges'] = df['TotalCharges'].fillna(fill_value)
 
     # encode target column: 'No' -> 0, 'Yes' -> 1
-    df['Churn'] = df['Churn'].map({'No': 0, 'Yes': 1})
+    if 'Churn' in df.columns:
+        df['Churn'] = df['Churn'].astype(object).map({'No': 0, 'Yes': 1})
 
     return df
 
+def read_raw(path: str):
+    """
+    Read the raw CSV with the explicit schema, using the pyarrow engine.
+    """
+    return pd.read_csv(path, dtype=RAW_DTYPES, engine='pyarrow')
+
+def _file_hash(path, block_size=1 << 20):
+    """
+    SHA-256 of the file contents, read in blocks.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_data(path: str, use_cache=True):
+    """
+    Load the dataset from CSV, clean and encode it for modeling.
+    - use_cache: reuse the cleaned dataset cached as Parquet under CACHE_DIR,
+      keyed on the hash of the source file
+    """
+    cache_path = None
+    if use_cache:
+        key = f"{_file_hash(path)[:16]}-v{CLEAN_CACHE_VERSION}"
+        cache_path = os.path.join(CACHE_DIR, f"clean-{key}.parquet")
+        if os.path.exists(cache_path):
+            return pd.read_parquet(cache_path)
+
+    # read raw data with explicit dtypes and clean it
+    df = clean_data(read_raw(path))
+
+    if cache_path is not None:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = f"{cache_path}.tmp-{os.getpid()}"
+        df.to_parquet(tmp)
+        os.replace(tmp, cache_path)
+
+    return df
+
+def load_eda_data(path: str, use_cache=True):
+    """
+    Load the cleaned dataset in the form the EDA plots expect:
+    Churn and SeniorCitizen as 'No'/'Yes'.
+    """
+    df = load_data(path, use_cache=use_cache)
+    df['Churn'] = df['Churn'].map({0: 'No', 1: 'Yes'}).astype('category')
+    # map SeniorCitizen from 0/1 to 'No'/'Yes' for plotting
+    df['SeniorCitizen'] = df['SeniorCitizen'].map({0: 'No', 1: 'Yes'}).astype('category')
+    return df
+
 def split_data(df, test_size=0.2, random_state=42):
     """
     Split data into training and test sets with stratified sampling.
@@ -1,11 +1,14 @@
+import numpy as np
 from sklearn.model_selection import StratifiedKFold, cross_val_score
 from sklearn.metrics import roc_auc_score, classification_report
 
-def cross_validate(model, X, y, n_splits=5):
+from src.config import CV_N_JOBS, BOOTSTRAP_RESAMPLES
+
+def cross_validate(model, X, y, n_splits=5, n_jobs=CV_N_JOBS):
     # set up stratified k-fold cross-validation
     skf = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=42)
-    # evaluate ROC-AUC over each fold
-    aucs = cross_val_score(model, X, y, cv=skf, scoring='roc_auc')
+    # evaluate ROC-AUC over each fold, folds run in parallel on n_jobs workers
+    aucs = cross_val_score(model, X, y, cv=skf, scoring='roc_auc', n_jobs=n_jobs)
     # display mean and standard deviation of ROC-AUC
     print(f"ROC-AUC CV: {aucs.mean():.3f} ± {aucs.std():.3f}")
     return aucs
@@ -15,14 +18,112 @@ def train_final(model, X, y):
     model.fit(X, y)
     return model
 
-def evaluate(model, X_test, y_test):
+def bootstrap_ci(y_true, y_score, y_pred=None, n_resamples=BOOTSTRAP_RESAMPLES,
+                 alpha=0.05, random_state=42, block_elements=2**24):
+    """
+    Percentile bootstrap confidence intervals for ROC-AUC and, with y_pred,
+    precision, recall, F1 (positive class) and accuracy.
+
+    The scores are sorted once. Each resample is an array of positions into
+    the sorted order: counting positives and negatives per distinct score
+    with one bincount gives every resample's AUC from a cumulative sum, and
+    the confusion matrix comes from a bincount of the per-position
+    TN/FP/FN/TP category. Resamples are drawn in blocks of about
+    block_elements positions to bound memory on large holdouts.
+    - y_true, y_score: binary labels and scores for the positive class
+    - y_pred: optional predicted labels for the classification metrics
+    - n_resamples: number of bootstrap resamples
+    - alpha: 0.05 gives 95% intervals
+    Returns {metric: (point estimate, lower, upper)}.
+    """
+    y_true = np.asarray(y_true).astype(bool)
+    y_score = np.asarray(y_score)
+    n = len(y_true)
+    rng = np.random.default_rng(random_state)
+
+    # sort once; tied scores share a group so ties count half, like roc_auc_score
+    order = np.argsort(y_score, kind='mergesort')
+    y_sorted = y_true[order]
+    sorted_score = y_score[order]
+    group = np.concatenate(([0], np.cumsum(sorted_score[1:] != sorted_score[:-1])))
+    n_groups = int(group[-1]) + 1
+
+    # TN=0, FP=1, FN=2, TP=3 for every sorted position
+    category = None
+    if y_pred is not None:
+        category = (2 * y_sorted + np.asarray(y_pred).astype(bool)[order]).astype(np.int64)
+
+    metrics = {'roc_auc': []}
+    if category is not None:
+        metrics.update({'precision': [], 'recall': [], 'f1': [], 'accuracy': []})
+
+    block = max(1, block_elements // max(n, n_groups))
+    for start in range(0, n_resamples, block):
+        size = min(block, n_resamples - start)
+        idx = rng.integers(0, n, size=(size, n))
+        # one row of counts per resample
+        offsets = np.arange(size)[:, None]
+
+        flat = (group[idx] + offsets * n_groups).ravel()
+        total = np.bincount(flat, minlength=size * n_groups).reshape(size, n_groups)
+        pos = np.bincount(flat, weights=y_sorted[idx].ravel(),
+                          minlength=size * n_groups).reshape(size, n_groups)
+        metrics['roc_auc'].append(_auc_from_counts(pos, total - pos))
+
+        if category is not None:
+            flat = (category[idx] + offsets * 4).ravel()
+            counts = np.bincount(flat, minlength=size * 4).reshape(size, 4)
+            for name, values in _classification_from_counts(counts).items():
+                metrics[name].append(values)
+
+    # point estimates on the holdout itself
+    point = {'roc_auc': roc_auc_score(y_true, y_score)}
+    if category is not None:
+        counts = np.bincount(category, minlength=4)[None, :]
+        point.update({
+            name: values[0] for name, values in _classification_from_counts(counts).items()
+        })
+
+    result = {}
+    for name, blocks in metrics.items():
+        values = np.concatenate(blocks)
+        lower, upper = np.nanpercentile(values, [100 * alpha / 2, 100 * (1 - alpha / 2)])
+        result[name] = (float(point[name]), float(lower), float(upper))
+    return result
+
+def _auc_from_counts(pos, neg):
+    # a positive beats every negative in lower score groups and ties half of its own
+    neg_below = np.cumsum(neg, axis=1) - neg
+    n_pos = pos.sum(axis=1)
+    n_neg = neg.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (pos * (neg_below + 0.5 * neg)).sum(axis=1) / (n_pos * n_neg)
+
+def _classification_from_counts(counts):
+    tn, fp, fn, tp = (counts[:, i].astype(float) for i in range(4))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return {
+            'precision': tp / (tp + fp),
+            'recall': tp / (tp + fn),
+            'f1': 2 * tp / (2 * tp + fp + fn),
+            'accuracy': (tp + tn) / counts.sum(axis=1)
+        }
+
+def evaluate(model, X_test, y_test, n_resamples=BOOTSTRAP_RESAMPLES):
     # get predicted probabilities for the positive (churn) class
     y_proba = model.predict_proba(X_test)[:, 1]
     # get predicted class labels
     y_pred = model.predict(X_test)
-    # compute ROC-AUC on the test set
-    auc = roc_auc_score(y_test, y_proba)
-    print(f"Test ROC-AUC  : {auc:.3f}")
+    # compute ROC-AUC and bootstrap confidence intervals on the test set
+    ci = bootstrap_ci(y_test, y_proba, y_pred, n_resamples=n_resamples)
+    auc, lower, upper = ci['roc_auc']
+    print(f"Test ROC-AUC  : {auc:.3f} (95% CI {lower:.3f}-{upper:.3f})")
     # print precision, recall, and f1-score
     print("\nClassification Report:\n",
           classification_report(y_test, y_pred, digits=3))
+    # uncertainty of the churn-class metrics
+    print(f"Bootstrap 95% CI ({n_resamples} resamples):")
+    for name in ('precision', 'recall', 'f1', 'accuracy'):
+        value, lower, upper = ci[name]
+        print(f"  {name:<9}: {value:.3f} ({lower:.3f}-{upper:.3f})")
+    return ci
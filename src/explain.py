@@ -0,0 +1,127 @@
+import math
+import numpy as np
+
+from src.compiled import CompiledScorer, _lookup
+
+class LinearExplainer:
+    """
+    Closed-form SHAP values for the compiled linear churn model.
+
+    With an interventional background, the SHAP value of a linear model is
+    coef * (x - background_mean) per transformed feature. Summed over the
+    one-hot columns of a categorical feature, that is the coefficient of the
+    customer's category minus the background-weighted mean coefficient of
+    the column, so each raw feature's contribution is one table lookup or
+    one scaled difference. The background means are folded into per-feature
+    offsets once, at construction.
+
+    Contributions are in log-odds: base_value plus the sum of all
+    contributions is the logit of the churn probability.
+    """
+    def __init__(self, scorer: CompiledScorer, background_mean):
+        """
+        - scorer: the compiled scorer of the served model
+        - background_mean: mean of the transformed training matrix, in the
+          preprocessing output order (numeric columns, then the categories
+          of each categorical column)
+        """
+        self.scorer = scorer
+        background_mean = np.asarray(background_mean, dtype=float)
+
+        # numeric block: mean of the scaled training values
+        k = len(scorer.numeric_cols)
+        self.numeric_background = background_mean[:k]
+
+        # categorical blocks: background-weighted mean coefficient per column
+        self.category_offsets = []
+        start = k
+        for coef in scorer.category_coef:
+            self.category_offsets.append(float(background_mean[start:start + len(coef)] @ coef))
+            start += len(coef)
+        if start != len(background_mean):
+            raise ValueError(
+                f"background_mean has {len(background_mean)} values, the model expects {start}"
+            )
+
+        self.features = scorer.numeric_cols + scorer.categorical_cols
+        # expected log-odds over the background
+        self.base_value = (
+            scorer.intercept
+            + float(self.numeric_background @ scorer.numeric_coef)
+            + sum(self.category_offsets)
+        )
+
+    def contributions(self, columns) -> np.ndarray:
+        """
+        columns: anything indexable by column name that returns an array,
+        e.g. a dict of arrays or a DataFrame
+        returns: (n_customers, n_features) array of log-odds contributions,
+        one column per entry of self.features
+        """
+        scorer = self.scorer
+        X_num = np.column_stack([
+            np.asarray(columns[col], dtype=float) for col in scorer.numeric_cols
+        ])
+        numeric = ((X_num - scorer.means) / scorer.scales - self.numeric_background) * scorer.numeric_coef
+
+        categorical = np.empty((len(X_num), len(scorer.categorical_cols)))
+        for j, (col, cats, coef) in enumerate(
+                zip(scorer.categorical_cols, scorer.categories, scorer.category_coef)):
+            if col == 'TenureBucket':
+                idx = scorer._bucket_index(columns['tenure'])
+                values = np.where(idx >= 0, scorer.tenure_coef[np.maximum(idx, 0)], 0.0)
+            else:
+                values = _lookup(cats, coef, columns[col])
+            categorical[:, j] = values - self.category_offsets[j]
+
+        return np.hstack([numeric, categorical])
+
+    def explain_records(self, samples: list, top_k=5) -> list:
+        """
+        samples: a list of dicts of raw feature values
+        top_k: number of features to return per customer, by absolute contribution
+        returns: one dict per sample with the churn probability, base_value
+        and the top_k {feature, value, contribution} entries, largest first
+        """
+        columns = {
+            col: np.array([s[col] for s in samples])
+            for col in self.scorer.numeric_cols + self.scorer.categorical_cols + ['tenure']
+            if col != 'TenureBucket'
+        }
+        contrib = self.contributions(columns)
+        logits = self.base_value + contrib.sum(axis=1)
+
+        # top_k per row by absolute contribution
+        top_k = min(top_k, contrib.shape[1])
+        order = np.argsort(-np.abs(contrib), axis=1, kind='stable')[:, :top_k]
+
+        labels = self.scorer.tenure_labels
+        buckets = self.scorer._bucket_index(columns['tenure'])
+        results = []
+        for i, sample in enumerate(samples):
+            entries = []
+            for j in order[i]:
+                feature = self.features[j]
+                if feature == 'TenureBucket':
+                    value = labels[buckets[i]] if buckets[i] >= 0 else None
+                else:
+                    value = sample[feature]
+                entries.append({
+                    'feature': feature,
+                    'value': value,
+                    'contribution': round(float(contrib[i, j]), 4)
+                })
+            results.append({
+                'churn_probability': round(1.0 / (1.0 + math.exp(-logits[i])), 3),
+                'base_value': round(self.base_value, 4),
+                'contributions': entries
+            })
+        return results
+
+def background_mean(pipeline, tenure_bucket, X) -> list:
+    """
+    Mean of the transformed feature matrix over raw features X,
+    saved with the artifacts as the explainer background.
+    """
+    Xt = pipeline[:-1].transform(tenure_bucket.transform(X))
+    return np.asarray(Xt.mean(axis=0)).ravel().tolist()
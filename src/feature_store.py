@@ -0,0 +1,306 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.config import (
+    DATA_PATH, ARTIFACT_PATH, FEATURE_STORE_PATH, FEATURE_STORE_SEGMENTS, BULK_CHUNKSIZE
+)
+from src.artifacts import replace_directory
+
+# bump when the layout of the feature store changes
+STORE_FORMAT_VERSION = 1
+
+MANIFEST = 'manifest.json'
+
+class FeatureStoreUnavailableError(RuntimeError):
+    """
+    Raised when no feature store has been built yet.
+    """
+
+def hash_id(customer_id: bytes) -> int:
+    """
+    64-bit hash of an encoded customerID, the key of the hash index.
+    """
+    return int.from_bytes(hashlib.blake2b(customer_id, digest_size=8).digest(), 'little')
+
+def _build_index(hashes):
+    """
+    Open-addressing hash table with linear probing, at most half full:
+    slot -> (hash, row + 1), 0 marking an empty slot. Built vectorized:
+    each round every unplaced row tries its next slot and the lowest
+    row wins a contested empty slot.
+    """
+    size = 1 << max(int(np.ceil(np.log2(max(2 * len(hashes), 2)))), 1)
+    mask = np.uint64(size - 1)
+    slot_hash = np.zeros(size, dtype=np.uint64)
+    slot_row = np.zeros(size, dtype=np.int64)
+
+    rows = np.arange(len(hashes))
+    pos = hashes & mask
+    while len(rows):
+        free = slot_row[pos] == 0
+        slots, first = np.unique(pos[free], return_index=True)
+        winners = rows[free][first]
+        slot_hash[slots] = hashes[winners]
+        slot_row[slots] = winners + 1
+
+        placed = np.zeros(len(rows), dtype=bool)
+        placed[np.flatnonzero(free)[first]] = True
+        rows, pos = rows[~placed], (pos[~placed] + np.uint64(1)) & mask
+    return slot_hash, slot_row
+
+def build_feature_store(input_path=DATA_PATH, store_path=FEATURE_STORE_PATH,
+                        artifact_path=ARTIFACT_PATH, chunksize=BULK_CHUNKSIZE,
+                        segments=FEATURE_STORE_SEGMENTS):
+    """
+    Score every customer in input_path once and save, per customer, the
+    transformed feature row and the churn score as memory-mapped arrays,
+    with a hash index from customerID to row and, for each segment column,
+    the rows of every segment sorted by descending score.
+    - input_path: raw customer data with a customerID column, CSV or Parquet
+    - store_path: target directory, replaced atomically if it already exists
+    - artifact_path: the pickled artifacts saved by run_serve
+    - segments: columns whose top-K "most at risk" queries are precomputed
+    When a customerID appears more than once, its last row is kept.
+    Memory stays bounded by chunksize plus a few numbers per customer.
+    """
+    from src.bulk_inference import iter_chunks
+    from src.data import clean_data
+    from src.registry import load_model
+
+    start = time.perf_counter()
+    model = load_model(artifact_path)
+    if model.pipeline is None:
+        raise ValueError(f"{artifact_path} has no pipeline to transform features with")
+    preproc = model.pipeline[:-1]
+
+    store_path = str(store_path).rstrip('/')
+    tmp = f"{store_path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    hashes, scores, codes, id_lengths = [], [], {col: [] for col in segments}, []
+    vocab = {col: {} for col in segments}
+    n_features = None
+    with open(os.path.join(tmp, 'features.bin'), 'wb') as features_file, \
+            open(os.path.join(tmp, 'id_bytes.bin'), 'wb') as ids_file:
+        for chunk in iter_chunks(input_path, chunksize):
+            if 'customerID' not in chunk.columns:
+                raise ValueError("the feature store needs a customerID column")
+            df = clean_data(chunk, model.artifacts.get('total_charges_mean'))
+            X = df.drop(columns=['customerID', 'Churn'], errors='ignore')
+
+            # transformed rows as dense float32, appended to the raw file
+            Xt = preproc.transform(model.tenure_bucket.transform(X))
+            # score the matrix already transformed instead of transforming X again
+            scores.append(model.pipeline[-1].predict_proba(Xt)[:, 1].astype(np.float32))
+            Xt = Xt.toarray() if hasattr(Xt, 'toarray') else np.asarray(Xt)
+            n_features = Xt.shape[1]
+            features_file.write(np.ascontiguousarray(Xt, dtype=np.float32).tobytes())
+
+            encoded = [i.encode() for i in df['customerID'].astype(str)]
+            ids_file.write(b''.join(encoded))
+            id_lengths.append(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)))
+            hashes.append(np.fromiter(map(hash_id, encoded), dtype=np.uint64, count=len(encoded)))
+
+            # integer code of every segment value, vocabularies in order of appearance
+            for col in segments:
+                values = df[col].astype(str).to_numpy()
+                for v in pd.unique(values):
+                    vocab[col].setdefault(v, len(vocab[col]))
+                codes[col].append(pd.Series(values).map(vocab[col]).to_numpy(np.int64))
+
+    if not hashes:
+        shutil.rmtree(tmp)
+        raise ValueError(f"no customers in {input_path}")
+    hashes = np.concatenate(hashes)
+    scores = np.concatenate(scores)
+    n = len(scores)
+
+    # the latest row of every customer: index and rank only those
+    latest = ~pd.Series(hashes).duplicated(keep='last').to_numpy()
+    rows = np.flatnonzero(latest)
+    slot_hash, slot_row_local = _build_index(hashes[rows])
+    slot_row = np.where(slot_row_local > 0, rows[np.maximum(slot_row_local - 1, 0)] + 1, 0)
+
+    def save(name, array):
+        array.tofile(os.path.join(tmp, name))
+        return {'dtype': array.dtype.str, 'shape': list(array.shape)}
+
+    arrays = {
+        'scores.bin': save('scores.bin', scores),
+        'id_offsets.bin': save('id_offsets.bin', np.concatenate([[0], np.cumsum(np.concatenate(id_lengths))])),
+        'index_hash.bin': save('index_hash.bin', slot_hash),
+        'index_row.bin': save('index_row.bin', slot_row),
+        # every customer by descending score, for the unfiltered top-K
+        'order_all.bin': save('order_all.bin', rows[np.argsort(-scores[rows], kind='stable')]),
+    }
+    arrays['features.bin'] = {'dtype': np.dtype(np.float32).str, 'shape': [n, n_features]}
+    arrays['id_bytes.bin'] = {'dtype': np.dtype(np.uint8).str,
+                              'shape': [os.path.getsize(os.path.join(tmp, 'id_bytes.bin'))]}
+
+    # per segment column: rows grouped by value, by descending score within a value
+    segment_offsets = {}
+    for col in segments:
+        col_codes = np.concatenate(codes[col])[rows]
+        order = rows[np.lexsort((-scores[rows], col_codes))]
+        counts = np.bincount(col_codes, minlength=len(vocab[col]))
+        bounds = np.concatenate([[0], np.cumsum(counts)]).tolist()
+        arrays[f'order_{col}.bin'] = save(f'order_{col}.bin', order)
+        segment_offsets[col] = {
+            value: [bounds[code], bounds[code + 1]] for value, code in vocab[col].items()
+        }
+        # the segment value of every row, returned with lookups
+        arrays[f'codes_{col}.bin'] = save(f'codes_{col}.bin', np.concatenate(codes[col]).astype(np.int32))
+
+    manifest = {
+        'format_version': STORE_FORMAT_VERSION,
+        'rows': n,
+        'customers': len(rows),
+        'feature_names': preproc.get_feature_names_out().tolist(),
+        'segments': segment_offsets,
+        'segment_values': {col: list(vocab[col]) for col in segments},
+        'arrays': arrays,
+        'input': input_path,
+        'artifact': str(artifact_path),
+        'built_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    # the manifest is written last: a directory without one is incomplete
+    with open(os.path.join(tmp, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    replace_directory(tmp, store_path)
+
+    print(f"Feature store with {len(rows):,} customers ({n_features} features) "
+          f"built in {time.perf_counter() - start:.1f}s, saved to {store_path}")
+    return manifest
+
+class FeatureStore:
+    """
+    Read side of the feature store: every array is memory-mapped,
+    so opening it is instant and worker processes share the pages.
+    """
+    def __init__(self, path):
+        # resolve the symlink once, so every array comes from the same build
+        path = os.path.realpath(str(path))
+        try:
+            with open(os.path.join(path, MANIFEST)) as f:
+                self.manifest = json.load(f)
+        except FileNotFoundError:
+            raise FeatureStoreUnavailableError(f"no feature store at {path}")
+        if self.manifest.get('format_version') != STORE_FORMAT_VERSION:
+            raise FeatureStoreUnavailableError(f"unsupported feature store format in {path}")
+        self.path = path
+        self.version = os.stat(os.path.join(path, MANIFEST)).st_mtime_ns
+
+        self.arrays = {
+            name: np.memmap(os.path.join(path, name), dtype=np.dtype(spec['dtype']),
+                            mode='r', shape=tuple(spec['shape']))
+            for name, spec in self.manifest['arrays'].items()
+        }
+        self.mask = len(self.arrays['index_hash.bin']) - 1
+        self.segments = self.manifest['segments']
+
+    def _customer_id(self, row):
+        start, end = self.arrays['id_offsets.bin'][row:row + 2]
+        return bytes(self.arrays['id_bytes.bin'][start:end]).decode()
+
+    def find(self, customer_id):
+        """
+        Row of customer_id, or None when it is not in the store.
+        """
+        key = hash_id(customer_id.encode())
+        slot_hash, slot_row = self.arrays['index_hash.bin'], self.arrays['index_row.bin']
+        pos = key & self.mask
+        # linear probing until an empty slot; the ID itself settles hash collisions
+        while row := int(slot_row[pos]):
+            if int(slot_hash[pos]) == key and self._customer_id(row - 1) == customer_id:
+                return row - 1
+            pos = (pos + 1) & self.mask
+        return None
+
+    def record(self, row, features=False) -> dict:
+        """
+        Stored score and segment values of one row, optionally with its
+        transformed feature values.
+        """
+        result = {
+            'customerID': self._customer_id(row),
+            'score': float(self.arrays['scores.bin'][row]),
+            'segments': {
+                col: self.manifest['segment_values'][col][int(self.arrays[f'codes_{col}.bin'][row])]
+                for col in self.segments
+            }
+        }
+        if features:
+            result['features'] = dict(zip(
+                self.manifest['feature_names'],
+                self.arrays['features.bin'][row].astype(float).tolist()
+            ))
+        return result
+
+    def top_k(self, k, segment=None, value=None) -> list:
+        """
+        The k customers with the highest churn score, optionally only those
+        whose segment column equals value. Reads k precomputed rows.
+        Raises KeyError for a segment column that was not precomputed.
+        """
+        if segment is None:
+            rows = self.arrays['order_all.bin'][:k]
+        else:
+            if segment not in self.segments:
+                raise KeyError(segment)
+            start, end = self.segments[segment].get(value, (0, 0))
+            rows = self.arrays[f'order_{segment}.bin'][start:min(end, start + k)]
+        return [self.record(int(row)) for row in rows]
+
+class FeatureStoreHolder:
+    """
+    Lazily opened feature store, reopened when it is rebuilt on disk.
+    """
+    def __init__(self, path):
+        self.path = str(path)
+        self._store = None
+        self._lock = threading.Lock()
+
+    def get(self) -> FeatureStore:
+        manifest = os.path.join(self.path, MANIFEST)
+        try:
+            version = os.stat(manifest).st_mtime_ns
+        except FileNotFoundError:
+            raise FeatureStoreUnavailableError(f"no feature store at {self.path}, build it first")
+        store = self._store
+        if store is None or store.version != version:
+            with self._lock:
+                if self._store is None or self._store.version != version:
+                    self._store = FeatureStore(self.path)
+                store = self._store
+        return store
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Build the per-customer feature store served by /customers/*."
+    )
+    parser.add_argument('--input', default=DATA_PATH,
+                        help="customer data with customerID (.csv or .parquet)")
+    parser.add_argument('--output', default=FEATURE_STORE_PATH,
+                        help="feature store directory")
+    parser.add_argument('--artifacts', default=ARTIFACT_PATH,
+                        help="pickled model artifacts from run_serve")
+    parser.add_argument('--chunksize', type=int, default=BULK_CHUNKSIZE,
+                        help="rows processed at a time")
+    parser.add_argument('--segments', nargs='+', default=FEATURE_STORE_SEGMENTS,
+                        help="columns to precompute top-K queries for")
+    args = parser.parse_args(argv)
+
+    build_feature_store(args.input, args.output, args.artifacts, args.chunksize, args.segments)
+
+if __name__ == '__main__':
+    main()
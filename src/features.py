@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from sklearn.base import TransformerMixin, BaseEstimator
 from sklearn.preprocessing import OneHotEncoder
@@ -6,43 +7,82 @@ from sklearn.compose import ColumnTransformer
 class TenureBucket(BaseEstimator, TransformerMixin):
     """
     Divide tenure into buckets (0-6, 7-12, 13-24, 25-48, 49-72).
+    - mode='cut': copy the frame and bucket with pd.cut; tenure outside
+      the edges becomes NaN
+    - mode='codes': bucket with np.searchsorted against the edges and add
+      a categorical column of int8 codes without copying the other columns;
+      tenure above the last edge goes to the last bucket
+    Both modes give the same bucket labels, so the one-hot output is identical.
     """
-    def __init__(self, bins=[0, 6, 12, 24, 48, 72]):
+    def __init__(self, bins=[0, 6, 12, 24, 48, 72], mode='cut'):
         # store the edges for tenure buckets
         self.bins = bins
+        # how buckets are computed, see above
+        self.mode = mode
+
+    def __setstate__(self, state):
+        # transformers pickled before `mode` existed keep the pd.cut behaviour
+        state.setdefault('mode', 'cut')
+        super().__setstate__(state)
 
     def fit(self, X, y=None):
         # no fitting needed, return self
         return self
 
+    def bucket_labels(self):
+        # one label per bucket, e.g. '0-6'
+        return [
+            f"{self.bins[i]}-{self.bins[i+1]}"
+            for i in range(len(self.bins) - 1)
+        ]
+
+    def bucket_codes(self, tenure):
+        """
+        Bucket index per tenure value, clipped into the first and last bucket.
+        Missing tenure gets -1.
+        """
+        tenure = np.asarray(tenure, dtype=float)
+        # right-closed buckets like pd.cut: (0, 6] -> 0, (6, 12] -> 1, ...
+        codes = np.searchsorted(np.asarray(self.bins, dtype=float), tenure, side='left') - 1
+        codes = np.clip(codes, 0, len(self.bins) - 2)
+        return np.where(np.isnan(tenure), -1, codes).astype(np.int8)
+
     def transform(self, X):
+        if self.mode == 'codes':
+            # shallow copy: the new column is added without copying the others
+            X = X.copy(deep=False)
+            X['TenureBucket'] = pd.Categorical.from_codes(
+                self.bucket_codes(X['tenure']),
+                categories=self.bucket_labels()
+            )
+            return X
+
         # work on a copy to avoid modifying the original DataFrame
         X = X.copy()
         # assign each tenure value to a bucket label
         X['TenureBucket'] = pd.cut(
             X['tenure'],
             bins=self.bins,
-            labels=[
-                f"{self.bins[i]}-{self.bins[i+1]}"
-                for i in range(len(self.bins) - 1)
-            ],
+            labels=self.bucket_labels(),
             include_lowest=True
         )
         # return the transformed DataFrame
         return X
 
-def create_features(df: pd.DataFrame):
+def create_features(df: pd.DataFrame, dense=False):
     """
     Take a cleaned DataFrame (with numeric TotalCharges and binary Churn),
     apply tenure bucketing, one-hot encode categoricals,
     and return (X, y) for modeling.
+    - dense: return a dense DataFrame; by default X is a sparse DataFrame
+      backed by the CSR output of the encoder
     """
     # pull out the target
     y = df["Churn"].copy()
     X = df.drop(columns=["customerID", "Churn"])
     
     # tenure → bucket
-    X = TenureBucket().fit_transform(X)
+    X = TenureBucket(mode='codes').fit_transform(X)
     
     # pick feature lists
     #    (adjust these to match what was used at training time)
@@ -56,16 +96,22 @@ def create_features(df: pd.DataFrame):
     ]
     
     # build a ColumnTransformer
+    #    (sparse_threshold=1 keeps the output CSR whatever its density)
     preproc = ColumnTransformer([
         ("onehot",
-         OneHotEncoder(sparse_output=False, handle_unknown="ignore"),
+         OneHotEncoder(sparse_output=not dense, handle_unknown="ignore"),
          cat_cols),
-    ], remainder="passthrough")
+    ], remainder="passthrough", sparse_threshold=0.0 if dense else 1.0)
     
     # fit & transform
     X_trans = preproc.fit_transform(X)
 
     # wrap back into a DataFrame
     feature_names = preproc.get_feature_names_out()
-    X_final = pd.DataFrame(X_trans, columns=feature_names, index=X.index)
+    if dense:
+        X_final = pd.DataFrame(X_trans, columns=feature_names, index=X.index)
+    else:
+        X_final = pd.DataFrame.sparse.from_spmatrix(
+            X_trans, index=X.index, columns=feature_names
+        )
     return X_final, y
\ No newline at end of file
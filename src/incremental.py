@@ -0,0 +1,396 @@
+import argparse
+import os
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import roc_auc_score
+from sklearn.preprocessing import StandardScaler
+
+from src.config import (
+    DATA_PATH, ARTIFACT_PATH, ARRAY_ARTIFACT_PATH, BULK_CHUNKSIZE,
+    INCREMENTAL_EPOCHS, INCREMENTAL_HOLDOUT, INCREMENTAL_UPDATE_ETA0
+)
+from src.data import clean_data
+from src.features import TenureBucket
+from src.model import build_pipeline
+from src.bulk_inference import iter_chunks
+from src.compiled import compile_pipeline, check_parity
+from src.artifacts import save_array_artifact
+
+NUMERIC_COLS = ['tenure', 'MonthlyCharges', 'TotalCharges']
+
+def holdout_mask(df, holdout) -> np.ndarray:
+    """
+    Rows kept out of training for evaluation, chosen by a hash of customerID
+    so the split is the same whatever the chunking or file order.
+    """
+    if holdout <= 0:
+        return np.zeros(len(df), dtype=bool)
+    key = df['customerID'] if 'customerID' in df.columns else df.index.to_series()
+    return pd.util.hash_pandas_object(key, index=False).to_numpy() % 1000 < holdout * 1000
+
+def _read_checkpoint(path, input_path, chunksize, mode):
+    """
+    Return the saved training state for this input, chunk size and mode, or None.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    state = joblib.load(path)
+    if (state.get('input'), state.get('chunksize'), state.get('mode')) != (input_path, chunksize, mode):
+        return None
+    return state
+
+def _write_checkpoint(path, state):
+    """
+    Atomically replace the checkpoint file.
+    """
+    joblib.dump(state, path + '.tmp')
+    os.replace(path + '.tmp', path)
+
+def _split_chunk(chunk, fill_value, holdout):
+    # clean one raw chunk and split it into training and holdout rows
+    df = clean_data(chunk, fill_value)
+    if 'Churn' not in df.columns:
+        raise ValueError("incremental training needs a Churn column")
+    mask = holdout_mask(df, holdout)
+    return df[~mask], df[mask]
+
+def _features(df):
+    return df.drop(columns=['customerID', 'Churn'], errors='ignore')
+
+def stream_statistics(input_path, chunksize, holdout, state=None, checkpoint=None):
+    """
+    First streaming pass over the training rows: scaler statistics,
+    the vocabulary of every categorical column, class counts and the
+    TotalCharges mean, one chunk in memory at a time.
+    """
+    state = state or {}
+    stats = state.get('stats') or {
+        'scaler': StandardScaler(),
+        'vocab': {},
+        'class_counts': np.zeros(2, dtype=np.int64),
+        'charges_sum': 0.0,
+        'charges_count': 0,
+        'rows': 0,
+    }
+    tb = TenureBucket(mode='codes')
+    skip = state.get('chunks_done', 0) if state.get('phase') == 'stats' else 0
+
+    for i, chunk in enumerate(iter_chunks(input_path, chunksize)):
+        if i < skip:
+            continue
+        # rows without TotalCharges are filled later, with the mean of the others
+        train, _ = _split_chunk(chunk, np.nan, holdout)
+        X = tb.transform(_features(train))
+
+        charges = X['TotalCharges'].dropna()
+        stats['charges_sum'] += float(charges.sum())
+        stats['charges_count'] += len(charges)
+        stats['scaler'].partial_fit(X[NUMERIC_COLS].fillna(X['TotalCharges'].mean()))
+        for col in X.columns:
+            if col not in NUMERIC_COLS:
+                stats['vocab'].setdefault(col, set()).update(X[col].dropna().unique().tolist())
+        stats['class_counts'] += np.bincount(train['Churn'].astype(int), minlength=2)
+        stats['rows'] += len(train)
+
+        if checkpoint:
+            _write_checkpoint(checkpoint, {**state, 'phase': 'stats', 'chunks_done': i + 1,
+                                           'stats': stats})
+    return stats
+
+def _new_pipeline(stats, first_chunk, alpha=None):
+    """
+    Pipeline with the same structure as build_pipeline, its encoder
+    vocabularies and scaler statistics taken from the streaming pass and
+    an SGDClassifier with log loss as classifier.
+    """
+    tb = TenureBucket(mode='codes')
+    categorical_cols = [c for c in stats['vocab'] if c not in NUMERIC_COLS]
+    n0, n1 = stats['class_counts']
+    rows = stats['rows']
+
+    pipeline = build_pipeline(categorical_cols, NUMERIC_COLS)
+    pipeline.set_params(
+        # sorted vocabularies, like OneHotEncoder(categories='auto') would find
+        preproc__cat__ohe__categories=[sorted(stats['vocab'][c]) for c in categorical_cols],
+        clf=SGDClassifier(
+            loss='log_loss', # logistic regression, trained by stochastic gradient descent
+            # the same penalty as LogisticRegression(C=1) on this many rows
+            alpha=alpha if alpha is not None else 1.0 / rows,
+            # class_weight='balanced' as in build_pipeline, which partial_fit
+            # cannot compute from a single chunk
+            class_weight={0: rows / (2.0 * n0), 1: rows / (2.0 * n1)},
+            average=True, # averaged SGD: smoother coefficients across chunks
+            random_state=42
+        )
+    )
+
+    # fit the preprocessing structure on one chunk, then use the streamed statistics
+    pipeline[:-1].fit(tb.transform(_features(first_chunk)))
+    num_pipe = pipeline.named_steps['preproc'].named_transformers_['num']
+    num_pipe.steps[-1] = ('scaler', stats['scaler'])
+    return pipeline, tb
+
+def _partial_fit(pipeline, X, y, rng):
+    # one shuffled pass of SGD over the chunk
+    order = rng.permutation(len(y))
+    Xt = pipeline[:-1].transform(X)[order]
+    pipeline[-1].partial_fit(Xt, np.asarray(y)[order], classes=np.array([0, 1]))
+
+def _prior_rows(artifacts):
+    # training rows behind a saved model: written by _save and by run_serve
+    return int(artifacts.get('incremental', {}).get('rows') or artifacts.get('training_rows') or 0)
+
+def _from_artifact(artifacts, stats, eta0):
+    """
+    Continue from a saved model: its preprocessing is kept as is, an
+    SGDClassifier keeps training and a LogisticRegression is turned into
+    one starting from its coefficients.
+    The penalty is that of all rows seen so far (saved ones plus new ones),
+    and the step size a small constant eta0 instead of the 'optimal'
+    schedule, which restarts with large steps and would wash out the
+    saved coefficients.
+    Returns (pipeline, from_linear, total rows).
+    """
+    pipeline = artifacts['pipeline']
+    clf = pipeline.named_steps['clf']
+    if not hasattr(clf, 'coef_'):
+        raise ValueError(f"cannot update a {type(clf).__name__} incrementally")
+
+    n0, n1 = stats['class_counts']
+    new_rows = stats['rows']
+    rows = _prior_rows(artifacts) + new_rows
+    update = {
+        'alpha': 1.0 / (getattr(clf, 'C', 1.0) * rows),
+        'class_weight': {0: new_rows / (2.0 * n0), 1: new_rows / (2.0 * n1)},
+        'learning_rate': 'constant',
+        'eta0': eta0,
+    }
+    if isinstance(clf, SGDClassifier):
+        # C is not an SGD parameter: the saved alpha was 1 / saved rows
+        update['alpha'] = 1.0 / rows
+        clf.set_params(**update)
+        return pipeline, False, rows
+
+    sgd = SGDClassifier(loss='log_loss', average=True, random_state=42, **update)
+    # sklearn only takes initial coefficients in fit; later chunks use partial_fit
+    sgd.coef_init_ = clf.coef_.copy()
+    sgd.intercept_init_ = clf.intercept_.copy()
+    pipeline.steps[-1] = ('clf', sgd)
+    return pipeline, True, rows
+
+def train_incremental(input_path=DATA_PATH, output_path=ARTIFACT_PATH,
+                      array_path=ARRAY_ARTIFACT_PATH, chunksize=BULK_CHUNKSIZE,
+                      epochs=INCREMENTAL_EPOCHS, holdout=INCREMENTAL_HOLDOUT,
+                      update_from=None, resume=False, parity=False,
+                      update_eta0=INCREMENTAL_UPDATE_ETA0):
+    """
+    Train (or update) the churn model over a chunked CSV or Parquet file
+    with bounded memory, and save it in the same artifact formats as run_serve.
+    - input_path: labeled raw customer data
+    - output_path, array_path: where the artifacts are written
+    - chunksize: rows read at a time
+    - epochs: passes of SGD over the data
+    - holdout: share of customers (by customerID hash) kept out of training
+      and used to report the holdout ROC-AUC
+    - update_from: an existing pickled artifact to continue training with
+      the new data instead of starting from scratch; its vocabularies and
+      scaler are kept (new categories are ignored, like in scoring)
+    - update_eta0: constant SGD step size when updating
+    - resume: continue from the checkpoint after a crash
+    - parity: also fit the batch LogisticRegression pipeline on the same
+      training rows (in memory) and compare its holdout ROC-AUC
+    Progress is checkpointed to <output_path>.incremental.ckpt after each chunk.
+    Returns a dict with the number of rows and the holdout ROC-AUC.
+    """
+    start = time.perf_counter()
+    mode = 'update' if update_from else 'train'
+    checkpoint = output_path + '.incremental.ckpt'
+    state = _read_checkpoint(checkpoint, input_path, chunksize, mode) if resume else None
+    state = state or {'input': input_path, 'chunksize': chunksize, 'mode': mode}
+    if state.get('phase'):
+        print(f"Resuming {mode} at {state['phase']} phase, chunk {state.get('chunks_done', 0)}")
+
+    # pass 1: statistics, unless the checkpoint is already past it
+    if state.get('phase') in (None, 'stats'):
+        stats = stream_statistics(input_path, chunksize, holdout, state, checkpoint)
+        state = {**state, 'phase': 'train', 'epoch': 0, 'chunks_done': 0, 'stats': stats}
+    stats = state['stats']
+    print(f"Statistics: {stats['rows']:,} training rows, class counts {stats['class_counts'].tolist()}")
+    if stats['rows'] == 0 or stats['class_counts'].min() == 0:
+        raise ValueError("the training rows must contain both classes")
+    fill_value = stats['charges_sum'] / max(stats['charges_count'], 1)
+    total_rows = stats['rows']
+
+    # the model: from the checkpoint, the artifact being updated, or new
+    first = next(iter_chunks(input_path, chunksize))
+    if 'pipeline' in state:
+        pipeline, tb = state['pipeline'], state['tenure_bucket']
+        fill_value = state.get('fill_value', fill_value)
+        total_rows = state.get('total_rows', total_rows)
+    elif update_from:
+        artifacts = joblib.load(update_from)
+        pipeline, from_linear, total_rows = _from_artifact(artifacts, stats, update_eta0)
+        tb = artifacts['tenure_bucket']
+        # keep filling TotalCharges like the saved model was trained
+        # (artifacts of older versions may hold None)
+        if artifacts.get('total_charges_mean') is not None:
+            fill_value = artifacts['total_charges_mean']
+        if from_linear:
+            # initialize from the LogisticRegression coefficients with one SGD pass
+            train, _ = _split_chunk(first, fill_value, holdout)
+            sgd = pipeline.named_steps['clf']
+            Xt = pipeline[:-1].transform(tb.transform(_features(train)))
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', ConvergenceWarning)
+                sgd.set_params(max_iter=1, tol=None)
+                sgd.fit(Xt, train['Churn'].to_numpy(),
+                        coef_init=sgd.coef_init_, intercept_init=sgd.intercept_init_)
+            del sgd.coef_init_, sgd.intercept_init_
+    else:
+        train, _ = _split_chunk(first, fill_value, holdout)
+        pipeline, tb = _new_pipeline(stats, train)
+    # fail before the epochs rather than when saving after them
+    fill_value = float(fill_value)
+    if not np.isfinite(fill_value):
+        raise ValueError(f"TotalCharges fill value is not a number: {fill_value}")
+
+    # pass 2: SGD over the chunks, checkpointed after each one
+    rng = np.random.default_rng(42)
+    for epoch in range(state['epoch'], epochs):
+        skip = state['chunks_done'] if epoch == state['epoch'] else 0
+        for i, chunk in enumerate(iter_chunks(input_path, chunksize)):
+            if i < skip:
+                continue
+            train, _ = _split_chunk(chunk, fill_value, holdout)
+            if len(train):
+                _partial_fit(pipeline, tb.transform(_features(train)), train['Churn'], rng)
+            state = {**state, 'epoch': epoch, 'chunks_done': i + 1,
+                     'pipeline': pipeline, 'tenure_bucket': tb,
+                     'fill_value': fill_value, 'total_rows': total_rows}
+            _write_checkpoint(checkpoint, state)
+        state = {**state, 'epoch': epoch + 1, 'chunks_done': 0}
+        print(f"epoch {epoch + 1}/{epochs} done ({time.perf_counter() - start:.1f}s)")
+
+    # pass 3: background means over the training rows, holdout scores
+    baseline = _batch_baseline(input_path, chunksize, fill_value, holdout) if parity else None
+    report = _evaluate(pipeline, tb, baseline, input_path, chunksize, fill_value, holdout)
+
+    _save(pipeline, tb, fill_value, report.pop('background_mean'), report.pop('sample'),
+          output_path, array_path, total_rows)
+    os.remove(checkpoint)
+
+    print(f"Holdout ROC-AUC SGD: {report['auc']:.4f} on {report['holdout_rows']:,} rows")
+    if baseline is not None:
+        print(f"Holdout ROC-AUC batch LogisticRegression: {report['baseline_auc']:.4f} "
+              f"(difference {report['auc'] - report['baseline_auc']:+.4f})")
+    print(f"{'Updated' if update_from else 'Trained'} on {stats['rows']:,} rows "
+          f"in {time.perf_counter() - start:.1f}s, saved to {output_path} and {array_path}")
+    return report
+
+def _batch_baseline(input_path, chunksize, fill_value, holdout):
+    # the current batch pipeline on exactly the same training rows
+    # (reads all training rows into memory, only for the parity check)
+    parts = [_split_chunk(chunk, fill_value, holdout)[0] for chunk in iter_chunks(input_path, chunksize)]
+    train = pd.concat(parts, ignore_index=True)
+    tb = TenureBucket(mode='codes')
+    X = tb.fit_transform(_features(train))
+    categorical_cols = [c for c in X.columns if c not in NUMERIC_COLS]
+    pipeline = build_pipeline(categorical_cols, NUMERIC_COLS).fit(X, train['Churn'])
+    return pipeline, tb
+
+def _evaluate(pipeline, tb, baseline, input_path, chunksize, fill_value, holdout):
+    """
+    One streaming pass: sum of the transformed training rows (explainer
+    background) and churn scores of the holdout rows.
+    """
+    total, rows = None, 0
+    labels, scores, baseline_scores = [], [], []
+    sample = None
+    for chunk in iter_chunks(input_path, chunksize):
+        train, test = _split_chunk(chunk, fill_value, holdout)
+        if len(train):
+            Xt = pipeline[:-1].transform(tb.transform(_features(train)))
+            col_sum = np.asarray(Xt.sum(axis=0)).ravel()
+            total = col_sum if total is None else total + col_sum
+            rows += len(train)
+        if len(test):
+            X = _features(test)
+            labels.append(test['Churn'].to_numpy())
+            scores.append(pipeline.predict_proba(tb.transform(X))[:, 1])
+            if baseline is not None:
+                baseline_scores.append(baseline[0].predict_proba(baseline[1].transform(X))[:, 1])
+            if sample is None:
+                sample = X.head(1000)
+
+    report = {'background_mean': (total / rows).tolist(), 'sample': sample,
+              'train_rows': rows, 'holdout_rows': 0, 'auc': float('nan')}
+    if labels:
+        y = np.concatenate(labels)
+        report['holdout_rows'] = len(y)
+        report['auc'] = roc_auc_score(y, np.concatenate(scores))
+        if baseline is not None:
+            report['baseline_auc'] = roc_auc_score(y, np.concatenate(baseline_scores))
+    return report
+
+def _save(pipeline, tb, fill_value, background, sample, output_path, array_path, rows):
+    # the same artifacts as run_serve, so the API and bulk scoring use it as is
+    scorer = compile_pipeline(pipeline, tb)
+    if sample is not None:
+        max_diff = check_parity(scorer, pipeline, tb, sample)
+        print(f"Compiled scorer parity: max |diff| = {max_diff:.2e}")
+
+    joblib.dump(
+        {
+            'pipeline': pipeline,
+            'tenure_bucket': tb,
+            'total_charges_mean': float(fill_value),
+            'background_mean': background,
+            # all rows the model has been trained on, for the penalty of later updates
+            'incremental': {'rows': int(rows)}
+        },
+        output_path + '.tmp'
+    )
+    os.replace(output_path + '.tmp', output_path)
+    save_array_artifact(
+        scorer, array_path,
+        extra={'total_charges_mean': float(fill_value), 'background_mean': background}
+    )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Train or update the churn model over a chunked CSV or Parquet file."
+    )
+    parser.add_argument('mode', choices=['train', 'update'],
+                        help="train from scratch, or update the existing artifact with new data")
+    parser.add_argument('--input', default=DATA_PATH,
+                        help="labeled customer data (.csv or .parquet)")
+    parser.add_argument('--artifacts', default=ARTIFACT_PATH,
+                        help="artifact to write (and to update from in update mode)")
+    parser.add_argument('--arrays', default=ARRAY_ARTIFACT_PATH,
+                        help="array artifact directory to write")
+    parser.add_argument('--chunksize', type=int, default=BULK_CHUNKSIZE,
+                        help="rows read per chunk")
+    parser.add_argument('--epochs', type=int, default=INCREMENTAL_EPOCHS,
+                        help="SGD passes over the data")
+    parser.add_argument('--holdout', type=float, default=INCREMENTAL_HOLDOUT,
+                        help="share of customers kept out for the holdout ROC-AUC")
+    parser.add_argument('--resume', action='store_true',
+                        help="continue from the last checkpoint")
+    parser.add_argument('--parity', action='store_true',
+                        help="compare against the batch LogisticRegression (loads the data)")
+    args = parser.parse_args(argv)
+
+    train_incremental(
+        args.input, args.artifacts, args.arrays, args.chunksize, args.epochs, args.holdout,
+        update_from=args.artifacts if args.mode == 'update' else None,
+        resume=args.resume, parity=args.parity
+    )
+
+if __name__ == '__main__':
+    main()
@@ -1,26 +1,49 @@
-import joblib
 import pandas as pd
 from pathlib import Path
 
-# Load once at import time
+from src.cache import PredictionCache, cache_key
+from src.config import (
+    PREDICTION_CACHE, CACHE_MAX_SIZE, CACHE_TTL_SECONDS, EXPLAIN_TOP_K,
+    MODEL_VERSIONS, SHADOW_MODELS, ROUTE_PERCENT, SHADOW_MAX_PENDING
+)
+from src.registry import ModelRegistry
+from src.routing import ModelRouter, PRIMARY, parse_pairs
+from src.feature_store import FeatureStoreHolder
+from src.metrics import stage_timer, observe_batch_size
+
+# shared, lazily loaded model: nothing is read from disk at import time
 ARTIFACT_PATH = Path(__file__).parents[1] / "outputs" / "churn_model_artifacts.pkl"
-_artifacts = joblib.load(ARTIFACT_PATH)
-_pipeline = _artifacts["pipeline"]
-_tenure_bucket = _artifacts["tenure_bucket"]
+ARRAY_ARTIFACT_PATH = Path(__file__).parents[1] / "outputs" / "churn_model_arrays"
+registry = ModelRegistry(ARTIFACT_PATH, ARRAY_ARTIFACT_PATH)
+
+# the primary model plus the versions configured next to it (CHURN_MODEL_VERSIONS),
+# with percentage routing and shadow scoring
+router = ModelRouter(
+    registry,
+    versions={
+        name: ModelRegistry(path)
+        for name, path in parse_pairs(MODEL_VERSIONS, 'CHURN_MODEL_VERSIONS').items()
+    },
+    shadows=SHADOW_MODELS,
+    percentages=parse_pairs(ROUTE_PERCENT, 'CHURN_ROUTE_PERCENT', float),
+    max_pending=SHADOW_MAX_PENDING
+)
+
+# precomputed scores by customerID, opened on first use
+FEATURE_STORE_PATH = Path(__file__).parents[1] / "outputs" / "feature_store"
+feature_store = FeatureStoreHolder(FEATURE_STORE_PATH)
+
+# optional cache in front of the model, invalidated when the model version changes
+cache = (
+    PredictionCache(max_size=CACHE_MAX_SIZE, ttl=CACHE_TTL_SECONDS)
+    if PREDICTION_CACHE else None
+)
 
-def predict_single(sample: dict) -> dict:
+def _to_result(proba) -> dict:
     """
-    sample: a dict of raw feature values
+    proba: raw churn probability from the classifier
     returns: { churn_probability: float, conclusion: str }
     """
-    # raw -> DataFrame
-    df = pd.DataFrame([sample])
-
-    # only transformed features -> array or sparse matrix
-    X = _tenure_bucket.transform(df)
-
-    # feed that into classifier
-    proba = _pipeline.predict_proba(X)[:, 1][0]
     proba = round(float(proba), 3)
 
     # human-friendly conclusion
@@ -32,3 +55,114 @@ def predict_single(sample: dict) -> dict:
 
     return {"churn_probability": proba, "conclusion": conclusion}
 
+def predict_single(sample: dict, version=PRIMARY) -> dict:
+    """
+    sample: a dict of raw feature values
+    version: name of the model version to score with (see router)
+    returns: { churn_probability: float, conclusion: str }
+    """
+    model = router.get(version)
+    # the cache only holds primary results
+    use_cache = cache is not None and version == PRIMARY
+
+    # serve repeated customers from the cache
+    if use_cache:
+        key = cache_key(sample)
+        result = cache.get(key, model.version)
+        if result is not None:
+            return result
+
+    observe_batch_size(1)
+
+    # compiled scorer: a few lookups and a dot product, no DataFrame
+    if model.compiled is not None:
+        with stage_timer('compiled'):
+            proba = model.compiled.predict_one(sample)
+    else:
+        # raw -> DataFrame
+        with stage_timer('frame'):
+            df = pd.DataFrame([sample])
+        proba = model.predict_proba(df)[0]
+    result = _to_result(proba)
+    # shadow versions score the same customer in the background
+    router.shadow(version, [sample], [proba])
+
+    if use_cache:
+        cache.put(key, model.version, result)
+    return result
+
+def predict_many(samples: list, version=PRIMARY) -> list:
+    """
+    samples: a list of dicts of raw feature values
+    version: name of the model version to score with (see router)
+    returns: one { churn_probability, conclusion } dict per sample, in input order
+
+    All samples are scored in a single vectorized predict_proba call,
+    so the pandas and sklearn overhead is paid once per batch.
+    Shadow versions then score the same batch in the background.
+    """
+    if not samples:
+        return []
+
+    model = router.get(version)
+    if cache is None or version != PRIMARY:
+        observe_batch_size(len(samples))
+        probas = model.predict_records(samples)
+        router.shadow(version, samples, probas)
+        return [_to_result(proba) for proba in probas]
+
+    # look every sample up first, then score only the misses in one pass
+    keys = [cache_key(sample) for sample in samples]
+    results = [cache.get(key, model.version) for key in keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        observe_batch_size(len(missing))
+        scored = [samples[i] for i in missing]
+        probas = model.predict_records(scored)
+        # cache hits were compared when they were first scored
+        router.shadow(version, scored, probas)
+        for i, proba in zip(missing, probas):
+            results[i] = _to_result(proba)
+            cache.put(keys[i], model.version, results[i])
+    return results
+
+def explain_many(samples: list, top_k=EXPLAIN_TOP_K) -> list:
+    """
+    samples: a list of dicts of raw feature values
+    top_k: number of features to return per customer
+    returns: one { churn_probability, base_value, contributions } dict per sample,
+    with the top_k features by absolute log-odds contribution
+    """
+    if not samples:
+        return []
+    explainer = registry.get().explainer
+    with stage_timer('explain'):
+        return explainer.explain_records(samples, top_k)
+
+def _stored_result(record: dict) -> dict:
+    # same fields as /predict, plus the customer and its segments
+    result = {"customerID": record.pop("customerID"), **_to_result(record.pop("score"))}
+    result.update(record)
+    return result
+
+def customer_score(customer_id: str, features=False):
+    """
+    customer_id: a customerID of the feature store
+    features: also return the transformed feature values
+    returns: { customerID, churn_probability, conclusion, segments[, features] },
+    or None when the customer is not in the store
+    """
+    store = feature_store.get()
+    with stage_timer('feature_store'):
+        row = store.find(customer_id)
+        return None if row is None else _stored_result(store.record(row, features))
+
+def most_at_risk(k: int, segment=None, value=None) -> list:
+    """
+    k: number of customers to return
+    segment, value: only customers whose segment column equals value
+    returns: up to k stored results by descending churn probability
+    """
+    store = feature_store.get()
+    with stage_timer('feature_store'):
+        return [_stored_result(record) for record in store.top_k(k, segment, value)]
@@ -1,11 +1,18 @@
+import numpy as np
 import shap
 import matplotlib.pyplot as plt
 from src.utils import save_fig
 from src.config import OUTPUT_DIR
+from src.compiled import compile_pipeline
+from src.explain import LinearExplainer
 
-def explain_model(pipeline, X):
+def explain_model(pipeline, X, n_samples=200, atol=1e-6):
     """
     Generate SHAP summary plots for either a linear model or a tree based model.
+    - n_samples: rows explained for models without coef_ (the permutation
+      explainer scores the model many times per row)
+    - atol: largest allowed gap between the sum of the SHAP values plus the
+      base value and clf.decision_function; raises ValueError above it
     """
     # get the preprocessing step from the pipeline
     preproc = pipeline.named_steps['preproc']
@@ -13,15 +20,23 @@ def explain_model(pipeline, X):
     clf = pipeline.named_steps['clf']
 
     # transform the original feature set into the numeric matrix
+    # (sparse CSR for the default pipeline, the SHAP explainers accept it as is)
     X_trans = preproc.transform(X)
     # take a small random sample to use as background data for SHAP
     background = shap.sample(X_trans, 100, random_state=42)
 
     # choose the right SHAP explainer depending on the model type
-    if hasattr(shap, "TreeExplainer") and clf.__class__.__name__.endswith("Classifier"):
-        # use TreeExplainer for tree based models like LightGBM or XGBoost
-        explainer = shap.TreeExplainer(clf, data=background)
-        shap_values = explainer.shap_values(X_trans)
+    if not hasattr(clf, "coef_"):
+        # shap.TreeExplainer misreads the native categorical (bitset) splits of
+        # HistGradientBoosting, so explain its log-odds model-agnostically on
+        # a sample of rows; one forward and backward permutation per row keeps
+        # the sum exact and the mean |SHAP| ranking of the default budget
+        X_trans = shap.sample(X_trans, n_samples, random_state=0)
+        explainer = shap.PermutationExplainer(
+            clf.decision_function, shap.maskers.Independent(background)
+        )
+        explanation = explainer(X_trans, max_evals=2 * X_trans.shape[1] + 1, silent=True)
+        shap_values, base_values = explanation.values, explanation.base_values
     else:
         # use LinearExplainer for linear models
         explainer = shap.LinearExplainer(
@@ -31,6 +46,16 @@ def explain_model(pipeline, X):
         )
         # shap_values is a 2D array for binary classification
         shap_values = explainer.shap_values(X_trans)
+        base_values = explainer.expected_value
+
+    # the contributions must add up to the model's own log-odds
+    max_diff = np.abs(
+        np.asarray(shap_values).sum(axis=1) + base_values - clf.decision_function(X_trans)
+    ).max()
+    if max_diff > atol:
+        raise ValueError(
+            f"SHAP values do not add up to decision_function: max |diff| = {max_diff:.2e}"
+        )
 
     # create a bar chart of mean absolute SHAP values
     plt.figure(figsize=(8, 6))
@@ -57,3 +82,41 @@ def explain_model(pipeline, X):
     plt.tight_layout()
     save_fig(plt.gcf(), OUTPUT_DIR + 'shap_summary_dot.png')
     plt.close()
+
+def check_shap_parity(pipeline, tenure_bucket, X, n_samples=200, atol=1e-9) -> float:
+    """
+    Compare the closed-form LinearExplainer behind /explain against
+    shap.LinearExplainer with the same interventional background.
+    SHAP values of the one-hot columns are summed per raw feature.
+    Raises ValueError when any contribution differs by more than atol.
+    Returns the largest absolute difference.
+    """
+    preproc = pipeline.named_steps['preproc']
+    clf = pipeline.named_steps['clf']
+
+    # same background for both explainers
+    background = shap.sample(preproc.transform(tenure_bucket.transform(X)), 100, random_state=42)
+    explainer = LinearExplainer(
+        compile_pipeline(pipeline, tenure_bucket),
+        np.asarray(background.mean(axis=0)).ravel()
+    )
+    # a data matrix as masker gives interventional SHAP values
+    reference = shap.LinearExplainer(clf, masker=background)
+
+    X_sample = X.sample(n=min(n_samples, len(X)), random_state=42)
+    expected = reference.shap_values(preproc.transform(tenure_bucket.transform(X_sample)))
+
+    # indicator matrix: transformed column -> raw feature
+    widths = [1] * len(explainer.scorer.numeric_cols) + [
+        len(coef) for coef in explainer.scorer.category_coef
+    ]
+    indicator = np.repeat(np.eye(len(widths)), widths, axis=0)
+    expected = np.asarray(expected) @ indicator
+
+    max_diff = float(max(
+        np.abs(explainer.contributions(X_sample) - expected).max(),
+        abs(explainer.base_value - float(np.ravel(reference.expected_value)[0]))
+    ))
+    if max_diff > atol:
+        raise ValueError(f"closed-form SHAP values differ from shap by {max_diff:.3g}")
+    return max_diff
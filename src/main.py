@@ -1,101 +1,238 @@
-import pandas as pd
-from src.config import DATA_PATH
-from src.utils import load_data
-from src.plots import (
-    plot_missing_matrix,
-    plot_gender_churn,
-    plot_contract_distribution,
-    plot_payment_method_distribution,
-    plot_payment_method_churn,
-    plot_internet_gender_churn,
-    plot_binary_churn,
-    plot_monthly_total_charges,
-    plot_correlation
+import argparse
+
+from src.config import (
+    DATA_PATH, OUTPUT_DIR, ARTIFACT_PATH, ARRAY_ARTIFACT_PATH, SCORES_PATH,
+    TUNING_METHOD, TUNING_TIME_BUDGET, PLOT_FORCE, STAGE_WORKERS, MODEL_BACKEND,
+    FEATURE_STORE_PATH, FEATURE_STORE_SEGMENTS
 )
-from src.data import load_data as load_ml_data, split_data
-from src.features import TenureBucket
-from src.model import build_pipeline
-from src.evaluate import cross_validate, train_final, evaluate
-from src.tuning import tune_pipeline
-from src.interpret import explain_model
-from src.serve import run_serve
+from src.stages import Stage, run_stages
 
-if __name__ == '__main__':
-    # EDA and Visualization setup
-    # load raw data for plotting (keeps churn as 'Yes'/'No')
-    df_raw = load_data(DATA_PATH)
-    # convert TotalCharges to numeric, invalid parsing becomes NaN
-    df_raw['TotalCharges'] = pd.to_numeric(df_raw['TotalCharges'], errors='coerce')
-    # drop rows where tenure is zero
-    df_raw = df_raw[df_raw['tenure'] > 0].copy()
-    # fill any missing TotalCharges with the mean
-    mean_tc = df_raw['TotalCharges'].mean()
-    df_raw['TotalCharges'] = df_raw['TotalCharges'].fillna(mean_tc)
-    # map SeniorCitizen from 0/1 to 'No'/'Yes' for plotting
-    df_raw['SeniorCitizen'] = df_raw['SeniorCitizen'].map({0: 'No', 1: 'Yes'})
-
-    # generate all EDA plots and save to outputs/
-    plot_missing_matrix(df_raw)
-    plot_gender_churn(df_raw)
-    plot_contract_distribution(df_raw)
-    plot_payment_method_distribution(df_raw)
-    plot_payment_method_churn(df_raw)
-    plot_internet_gender_churn(df_raw)
-    plot_binary_churn(
-        df_raw,
-        ['Partner', 'Dependents', 'TechSupport',
-         'OnlineSecurity', 'PaperlessBilling', 'PhoneService', 'SeniorCitizen']
-    )
-    plot_monthly_total_charges(df_raw)
-    plot_correlation(df_raw)
+# every stage imports what it needs when it runs, so running one part of the
+# workflow (see src/cli.py) never loads shap or the plotting libraries
+# for another
+
+# define numeric feature columns, every other column is categorical
+NUMERIC_COLS = ['tenure', 'MonthlyCharges', 'TotalCharges']
+
+# parameter grid for LogisticRegression
+# (liblinear ignores warm_start, so method='path' fits every C from scratch;
+# it is still faster here than a warm-started saga path)
+PARAM_DIST = {
+    'clf__C': [0.01, 0.1, 1, 10, 100],
+    'clf__penalty': ['l1', 'l2'],
+    'clf__solver': ['liblinear']
+}
+
+# parameter grid for HistGradientBoostingClassifier (CHURN_MODEL=hgb)
+HGB_PARAM_DIST = {
+    'clf__learning_rate': [0.02, 0.05, 0.1, 0.2],
+    'clf__max_leaf_nodes': [7, 15, 31, 63],
+    'clf__min_samples_leaf': [20, 50, 100],
+    'clf__l2_regularization': [0.0, 0.1, 1.0],
+    'clf__max_iter': [100, 200, 400]
+}
+
+def stage_eda(data_path, force):
+    from src.data import load_eda_data
+    from src.plot_runner import run_plots
+
+    # load the cleaned data for plotting (churn and SeniorCitizen as 'Yes'/'No'),
+    # served from the Parquet cache after the first run
+    df_raw = load_eda_data(data_path)
+    # generate all EDA plots and save to outputs/, in parallel worker
+    # processes; plots whose data and settings are unchanged are skipped
+    # (set CHURN_PLOT_FORCE=1 to re-render everything)
+    run_plots(df_raw, force=force)
+
+def stage_data(data_path):
+    from src.data import load_data as load_ml_data, split_data
+    from src.features import TenureBucket
 
-    # Modeling pipeline (prepare data for ML)
     # load and clean data, map churn to 0/1
-    df = load_ml_data(DATA_PATH)
+    df = load_ml_data(data_path)
     # split into train and test sets with stratification
     X_train, X_test, y_train, y_test = split_data(df)
+    return {
+        'X_train': X_train, 'X_test': X_test,
+        'y_train': y_train, 'y_test': y_test,
+        # custom transformer to bucket tenure into categories
+        'tenure_bucket': TenureBucket(mode='codes').fit(X_train),
+        # used to fill missing TotalCharges when scoring new data in chunks
+        'total_charges_mean': float(df['TotalCharges'].mean())
+    }
+
+def _features(data):
+    # apply the tenure bucketing to the train and test features
+    tb = data['tenure_bucket']
+    return tb.transform(data['X_train']), tb.transform(data['X_test'])
+
+def _pipeline(X_train, memory, model):
+    from src.model import build_pipeline
 
-    # apply custom transformer to bucket tenure into categories
-    tb = TenureBucket()
-    X_train = tb.fit_transform(X_train)
-    X_test  = tb.transform(X_test)
+    # build the sklearn pipeline (preprocessing + classifier), sharing the
+    # cached preprocessing of each fold with the other stages
+    categorical_cols = [c for c in X_train.columns if c not in NUMERIC_COLS]
+    return build_pipeline(categorical_cols, NUMERIC_COLS, memory=memory, model=model)
 
-    # define numeric and categorical feature columns
-    numeric_cols = ['tenure', 'MonthlyCharges', 'TotalCharges']
-    categorical_cols = [c for c in X_train.columns if c not in numeric_cols]
+def _folds(n_splits):
+    from sklearn.model_selection import StratifiedKFold
 
-    # build the sklearn pipeline (preprocessing + classifier)
-    pipeline = build_pipeline(categorical_cols, numeric_cols)
+    # the same folds in cross validation and tuning, so their cached preprocessing is reused
+    return StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=42)
+
+def stage_cv(data, n_splits, model, memory):
+    from src.evaluate import cross_validate
 
-    # Cross validation and final evaluation
     # run stratified cross validation and show CV ROC-AUC
-    cross_validate(pipeline, X_train, y_train)
+    X_train, _ = _features(data)
+    return cross_validate(_pipeline(X_train, memory, model), X_train, data['y_train'],
+                          n_splits=n_splits)
+
+def stage_fit(data, model, memory):
+    from src.evaluate import train_final
+    from src.utils import report_memory
 
     # train final model on the full training set
-    model = train_final(pipeline, X_train, y_train)
+    X_train, _ = _features(data)
+    fitted = train_final(_pipeline(X_train, memory, model), X_train, data['y_train'])
+    # show how much memory the sparse feature matrix saves over a dense one
+    report_memory(fitted.named_steps['preproc'].transform(X_train), 'Transformed X_train')
+    # the preprocessing cache is removed after the run, the model must not point to it
+    return fitted.set_params(memory=None)
+
+def stage_evaluate(data, fit):
+    from src.evaluate import evaluate
+
     # evaluate on the hold-out test set
-    evaluate(model, X_test, y_test)
-
-    # Hyperparameter tuning
-    # parameter grid for LogisticRegression
-    param_dist = {
-        'clf__C': [0.01, 0.1, 1, 10, 100],
-        'clf__penalty': ['l1', 'l2'],
-        'clf__solver': ['liblinear']
-    }
+    _, X_test = _features(data)
+    return evaluate(fit, X_test, data['y_test'])
+
+def stage_tune(data, param_dist, method, time_budget, n_splits, model, memory):
+    from src.tuning import tune_pipeline
+
+    # search C and penalty (or the tree parameters) to optimize ROC-AUC
+    # (refits the best pipeline)
     print("Tuning hyperparameters...")
-    # run randomized search to optimize ROC-AUC
-    best_pipeline = tune_pipeline(pipeline, param_dist, X_train, y_train)
+    if model == 'hgb' and method == 'path':
+        # the regularization path only exists for LogisticRegression
+        print("No regularization path for gradient boosting, using method='halving'")
+        method = 'halving'
+    X_train, _ = _features(data)
+    best_pipeline = tune_pipeline(
+        _pipeline(X_train, memory, model), param_dist, X_train, data['y_train'],
+        cv=_folds(n_splits), method=method, time_budget=time_budget
+    )
+    return best_pipeline.set_params(memory=None)
+
+def stage_evaluate_tuned(data, tune):
+    from src.evaluate import evaluate
 
-    # retrain best pipeline on full training set
-    best_pipeline.fit(X_train, y_train)
     # evaluate tuned model on test set
-    evaluate(best_pipeline, X_test, y_test)
+    _, X_test = _features(data)
+    return evaluate(tune, X_test, data['y_test'])
+
+def stage_explain(data, tune):
+    import matplotlib
+    # this stage draws with pyplot on a worker thread of run_stages, where
+    # GUI backends (e.g. macosx) fail; it is the only in-process pyplot user,
+    # the EDA plots render in their own processes
+    matplotlib.use('Agg')
+    from src.interpret import explain_model, check_shap_parity
 
-    # Model interpretation
     # generate SHAP summary plots for the tuned model
-    explain_model(best_pipeline, X_train)
+    X_train, _ = _features(data)
+    explain_model(tune, X_train)
+    if not hasattr(tune.named_steps['clf'], 'coef_'):
+        # /explain only serves linear models
+        return None
+    # the /explain endpoint must give the same contributions as shap
+    max_diff = check_shap_parity(tune, data['tenure_bucket'], X_train)
+    print(f"Closed-form SHAP parity: max |diff| = {max_diff:.2e}")
+    return max_diff
+
+def stage_serve(data, fit):
+    from src.serve import run_serve
+
+    # save the final model and transformer for inference,
+    # reusing the split and the model fitted above instead of retraining
+    run_serve(
+        X_raw=data['X_train'], y_train=data['y_train'],
+        total_charges_mean=data['total_charges_mean'],
+        pipeline=fit, tenure_bucket=data['tenure_bucket']
+    )
+
+def stage_bulk(data_path, serve):
+    from src.bulk_inference import run_bulk_inference
+
+    # score every customer and write outputs/churn_scores.csv
+    run_bulk_inference(input_path=data_path)
 
-    # Save artifacts and run batch scoring
-    # save the final model and transformer for inference
-    run_serve()
+def stage_feature_store(data_path, segments, serve):
+    from src.feature_store import build_feature_store
+
+    # transformed features and scores of every customer, looked up by
+    # customerID in the API instead of re-sending the whole record
+    build_feature_store(input_path=data_path, segments=segments)
+
+# the workflow: each stage reruns only when its parameters, code or an
+# upstream result changed; EDA and modeling branches run concurrently
+STAGES = [
+    # EDA plots keep their own per-plot cache (src/plot_runner.py)
+    Stage('eda', stage_eda, params={'data_path': DATA_PATH, 'force': PLOT_FORCE},
+          cache=False),
+    Stage('data', stage_data, params={'data_path': DATA_PATH}, files=[DATA_PATH],
+          code=['src.data', 'src.features']),
+    Stage('cv', stage_cv, inputs=['data'], params={'n_splits': 5, 'model': MODEL_BACKEND},
+          code=['src.evaluate', 'src.model'], resources=['memory']),
+    Stage('fit', stage_fit, inputs=['data'], params={'model': MODEL_BACKEND},
+          code=['src.evaluate', 'src.model', 'src.utils'], resources=['memory']),
+    Stage('evaluate', stage_evaluate, inputs=['data', 'fit'], code=['src.evaluate']),
+    Stage('tune', stage_tune, inputs=['data'],
+          params={'param_dist': HGB_PARAM_DIST if MODEL_BACKEND == 'hgb' else PARAM_DIST,
+                  'method': TUNING_METHOD,
+                  'time_budget': TUNING_TIME_BUDGET, 'n_splits': 5, 'model': MODEL_BACKEND},
+          code=['src.tuning', 'src.model'], resources=['memory']),
+    Stage('evaluate_tuned', stage_evaluate_tuned, inputs=['data', 'tune'], code=['src.evaluate']),
+    Stage('explain', stage_explain, inputs=['data', 'tune'],
+          code=['src.interpret', 'src.explain', 'src.compiled'],
+          outputs=[OUTPUT_DIR + 'shap_summary_bar.png', OUTPUT_DIR + 'shap_summary_dot.png']),
+    # only linear models have an array artifact
+    Stage('serve', stage_serve, inputs=['data', 'fit'],
+          code=['src.serve', 'src.compiled', 'src.explain', 'src.artifacts'],
+          outputs=[ARTIFACT_PATH] + ([ARRAY_ARTIFACT_PATH] if MODEL_BACKEND == 'logreg' else [])),
+    Stage('bulk', stage_bulk, inputs=['serve'], params={'data_path': DATA_PATH},
+          code=['src.bulk_inference'], outputs=[SCORES_PATH]),
+    Stage('feature_store', stage_feature_store, inputs=['serve'],
+          params={'data_path': DATA_PATH, 'segments': FEATURE_STORE_SEGMENTS},
+          files=[DATA_PATH], code=['src.feature_store'], outputs=[FEATURE_STORE_PATH]),
+]
+
+def run_workflow(targets=None, force=(), workers=STAGE_WORKERS, stages=STAGES):
+    """
+    Run the stages needed for targets (default: all of them).
+    """
+    from src.model import PreprocessingCache
+
+    # the fitted preprocessing of each fold is cached on disk and shared by
+    # cross validation, every tuning candidate and the final fits;
+    # the cache is removed (and the saved fit time printed) on exit
+    with PreprocessingCache() as memory:
+        return run_stages(
+            stages, force=force, resources={'memory': memory},
+            workers=workers, targets=targets
+        )
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run EDA, modeling, tuning, interpretation, artifact export and batch scoring"
+    )
+    parser.add_argument('--force', nargs='+', default=[], metavar='STAGE',
+                        help="rerun these stages and every stage downstream of them, or 'all'")
+    parser.add_argument('--workers', type=int, default=STAGE_WORKERS,
+                        help="stages that may run at the same time")
+    args = parser.parse_args()
+
+    run_workflow(force=args.force, workers=args.workers)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+
+from src.config import METRICS_ENABLED
+
+# upper bounds in seconds for stage and request latencies
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5
+)
+
+# upper bounds for the number of customers scored per model call
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096, 16384)
+
+class Histogram:
+    """
+    Minimal Prometheus-style histogram with one optional label.
+    """
+    def __init__(self, name, help_text, buckets, label=None):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.label = label
+        # per label value: [count per bucket (+Inf last), sum, total count]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, label_value=None):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        """
+        Lines in the Prometheus text exposition format.
+        """
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: (list(v[0]), v[1], v[2]) for k, v in self._series.items()}
+        for label_value, (counts, total, count) in sorted(series.items(), key=lambda kv: str(kv[0])):
+            labels = f'{self.label}="{label_value}",' if self.label else ''
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float('inf'),), counts):
+                cumulative += c
+                le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                lines.append(f'{self.name}_bucket{{{labels}le="{le}"}} {cumulative}')
+            plain = f'{{{labels.rstrip(",")}}}' if labels else ''
+            lines.append(f'{self.name}_sum{plain} {total}')
+            lines.append(f'{self.name}_count{plain} {count}')
+        return lines
+
+STAGE_LATENCY = Histogram(
+    'churn_stage_duration_seconds',
+    'Time spent in each stage of the scoring path.',
+    LATENCY_BUCKETS, label='stage'
+)
+REQUEST_LATENCY = Histogram(
+    'churn_request_duration_seconds',
+    'End-to-end HTTP request latency.',
+    LATENCY_BUCKETS, label='endpoint'
+)
+BATCH_SIZE = Histogram(
+    'churn_batch_size',
+    'Number of customers scored per model call.',
+    BATCH_SIZE_BUCKETS
+)
+
+class _StageTimer:
+    """
+    Context manager that records its duration under a stage name.
+    """
+    __slots__ = ('stage', 'start')
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        STAGE_LATENCY.observe(time.perf_counter() - self.start, self.stage)
+        return False
+
+# shared no-op timer, so disabled instrumentation allocates nothing
+_NULL_TIMER = nullcontext()
+
+def stage_timer(stage):
+    """
+    Time a block of the scoring path:
+        with stage_timer('classify'):
+            ...
+    Returns a shared no-op context manager when metrics are disabled.
+    """
+    if not METRICS_ENABLED:
+        return _NULL_TIMER
+    return _StageTimer(stage)
+
+def observe_stage(stage, seconds):
+    """
+    Record a stage duration measured elsewhere.
+    """
+    if METRICS_ENABLED:
+        STAGE_LATENCY.observe(seconds, stage)
+
+def observe_batch_size(n):
+    """
+    Record how many customers one model call scored.
+    """
+    if METRICS_ENABLED:
+        BATCH_SIZE.observe(n)
+
+def render_prometheus() -> str:
+    """
+    All metrics in the Prometheus text exposition format.
+    """
+    lines = []
+    for histogram in (STAGE_LATENCY, BATCH_SIZE, REQUEST_LATENCY):
+        lines.extend(histogram.render())
+    return '\n'.join(lines) + '\n'
@@ -1,14 +1,41 @@
+import os
+import shutil
+import tempfile
+import time
+
+from joblib import Memory
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+import numpy as np
+from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder, StandardScaler
 from sklearn.linear_model import LogisticRegression
+from sklearn.ensemble import HistGradientBoostingClassifier
+
+from src.config import PREPROC_CACHE_MAX_BYTES
 
-def build_pipeline(categorical_cols, numeric_cols):
+# classifiers build_pipeline can put behind the preprocessing
+MODEL_BACKENDS = ('logreg', 'hgb')
+
+def build_pipeline(categorical_cols, numeric_cols, dense=False, memory=None,
+                   model='logreg'):
     """
     Create a scikit-learn Pipeline that
     - applies preprocessing to numeric and categorical features
-    - fits a logistic regression classifier
+    - fits a classifier, chosen by model:
+      'logreg': scaler + one-hot encoding + logistic regression;
+      the transformed matrix is sparse CSR from encoding through fitting,
+      pass dense=True to get a dense matrix instead
+      'hgb': ordinal-encoded categoricals + HistGradientBoostingClassifier,
+      which splits on categories natively (see _hgb_pipeline);
+      the src/main.py stages and run_serve pass CHURN_MODEL here
+    - memory: joblib.Memory (e.g. a PreprocessingCache) so the fitted
+      preprocessing is reused across CV folds and tuning candidates
     """
+    if model == 'hgb':
+        return _hgb_pipeline(categorical_cols, numeric_cols, memory)
+    if model != 'logreg':
+        raise ValueError(f"Unknown model {model!r}, expected one of {MODEL_BACKENDS}")
+
     # pipeline for numeric features: scale values to zero mean and unit variance
     num_pipe = Pipeline([
         ('scaler', StandardScaler())
@@ -16,14 +43,14 @@ def build_pipeline(categorical_cols, numeric_cols):
 
     # pipeline for categorical features: one-hot encode unseen categories safely
     cat_pipe = Pipeline([
-        ('ohe', OneHotEncoder(handle_unknown='ignore'))
+        ('ohe', OneHotEncoder(handle_unknown='ignore', sparse_output=not dense))
     ])
 
     # combine numeric and categorical pipelines into a single transformer
     preproc = ColumnTransformer([
         ('num', num_pipe, numeric_cols), # apply scaler to numeric columns
         ('cat', cat_pipe, categorical_cols) # apply one-hot to categorical columns
-    ])
+    ], sparse_threshold=0.0 if dense else 1.0) # always CSR unless dense is requested
 
     # final pipeline: preprocessing followed by logistic regression
     pipeline = Pipeline([
@@ -34,6 +61,121 @@ def build_pipeline(categorical_cols, numeric_cols):
             class_weight='balanced', # handle class imbalance automatically
             random_state=42 # for reproducible results
         ))
-    ])
+    ], memory=memory)
 
     return pipeline
+
+def _hgb_pipeline(categorical_cols, numeric_cols, memory=None):
+    """
+    Histogram gradient boosting: one integer code per category instead of
+    one column per category, numeric columns passed through unscaled
+    (trees only use their order). The classifier bins the features once
+    and builds every tree on the bins with OpenMP threads.
+    """
+    # categories unseen in training become NaN, which the trees treat as missing
+    preproc = ColumnTransformer([
+        ('num', 'passthrough', numeric_cols),
+        ('cat', OrdinalEncoder(
+            handle_unknown='use_encoded_value', unknown_value=np.nan,
+            encoded_missing_value=np.nan
+        ), categorical_cols)
+    ], sparse_threshold=0.0)
+
+    # the encoded categorical columns come after the numeric ones
+    categorical_mask = [False] * len(numeric_cols) + [True] * len(categorical_cols)
+
+    return Pipeline([
+        ('preproc', preproc),
+        ('clf', HistGradientBoostingClassifier(
+            categorical_features=categorical_mask, # native categorical splits
+            learning_rate=0.05,
+            max_leaf_nodes=15,
+            class_weight='balanced', # same class balancing as the linear model
+            random_state=42
+        ))
+    ], memory=memory)
+
+class _CountedCall:
+    """
+    Wrap a cached function to record every call as a hit or a miss.
+    Whether a call is a hit is asked from joblib before the call, so an
+    entry evicted by reduce_size and computed again counts as a miss.
+    Calls are recorded by appending a line to a file, so fits running in
+    worker processes (n_jobs=-1) are recorded too.
+    """
+    def __init__(self, func, memory):
+        self.func = func
+        self.memory = memory
+
+    def __call__(self, *args, **kwargs):
+        hit = self.func.check_call_in_cache(*args, **kwargs)
+        start = time.perf_counter()
+        result = self.func(*args, **kwargs)
+        seconds = time.perf_counter() - start
+        with open(self.memory.counter_path, 'a') as f:
+            f.write('hit\n' if hit else f'miss {seconds}\n')
+        # keep the cache bounded on disk, least recently used entries go first
+        self.memory.reduce_size(bytes_limit=self.memory.max_bytes)
+        return result
+
+class PreprocessingCache(Memory):
+    """
+    joblib.Memory for Pipeline(memory=...) in a temporary directory.
+
+    Only clf__* parameters are tuned, so the fitted ColumnTransformer of a
+    given fold is the same for every candidate: with this cache it is
+    computed once per fold and loaded from disk afterwards. The directory
+    is bounded to max_bytes and removed when the context manager exits,
+    after printing how much preprocessing fit time was saved.
+    """
+    def __init__(self, location=None, max_bytes=PREPROC_CACHE_MAX_BYTES):
+        location = location or tempfile.mkdtemp(prefix='churn-preproc-')
+        super().__init__(location=location, verbose=0)
+        self.max_bytes = max_bytes
+        self.counter_path = os.path.join(location, 'calls')
+
+    def cache(self, func=None, **kwargs):
+        cached = super().cache(func, **kwargs)
+        return _CountedCall(cached, self) if func is not None else cached
+
+    def stats(self) -> dict:
+        """
+        Preprocessing fits requested, computed and reused, with the
+        estimated fit time the reuse saved.
+        """
+        hits, durations = 0, []
+        if os.path.exists(self.counter_path):
+            with open(self.counter_path) as f:
+                for line in f:
+                    if line.startswith('hit'):
+                        hits += 1
+                    elif line.startswith('miss'):
+                        durations.append(float(line.split()[1]))
+
+        computed = len(durations)
+        calls = computed + hits
+        reused = hits
+        mean_fit = sum(durations) / computed if computed else 0.0
+        return {
+            'fits_requested': calls,
+            'fits_computed': computed,
+            'fits_reused': reused,
+            'fit_seconds_computed': sum(durations),
+            'fit_seconds_saved': reused * mean_fit
+        }
+
+    def report(self):
+        stats = self.stats()
+        total = stats['fit_seconds_computed'] + stats['fit_seconds_saved']
+        print(f"Preprocessing cache: {stats['fits_requested']} fits requested, "
+              f"{stats['fits_computed']} computed, {stats['fits_reused']} reused; "
+              f"~{stats['fit_seconds_saved']:.2f}s of {total:.2f}s preprocessing fit time saved")
+        return stats
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.report()
+        shutil.rmtree(self.location, ignore_errors=True)
+        return False
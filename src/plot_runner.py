@@ -0,0 +1,181 @@
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from src.config import DATA_PATH, OUTPUT_DIR, PLOT_CONFIG, PLOT_WORKERS
+
+# where the hash of every rendered plot is remembered
+PLOT_CACHE_PATH = os.path.join(OUTPUT_DIR, '.plot_cache.json')
+
+BINARY_FEATURES = [
+    'Partner', 'Dependents', 'TechSupport',
+    'OnlineSecurity', 'PaperlessBilling', 'PhoneService', 'SeniorCitizen'
+]
+
+def plot_tasks() -> dict:
+    """
+    Every EDA plot rendered by src/main.py:
+    name -> (function in src/plots.py, extra arguments, input columns
+    (None for all), PLOT_CONFIG keys, output files).
+    Each binary feature is its own task so it is cached and rendered on its own.
+    """
+    tasks = {
+        'missing_matrix': ('plot_missing_matrix', (), None, [], ['missing_matrix.png']),
+        'gender_churn': ('plot_gender_churn', (), ['gender', 'Churn'], ['pie'],
+                         ['gender_churn.png']),
+        'contract_distribution': ('plot_contract_distribution', (), ['Contract', 'Churn'],
+                                  ['hist'], ['customer_contract_distribution.png']),
+        'payment_method_distribution': ('plot_payment_method_distribution', (),
+                                        ['PaymentMethod'], ['pie'], ['payment_method_dist.png']),
+        'payment_method_churn': ('plot_payment_method_churn', (), ['Churn', 'PaymentMethod'],
+                                 ['hist'], ['payment_method_churn.png']),
+        'internet_gender_churn': ('plot_internet_gender_churn', (),
+                                  ['Churn', 'gender', 'InternetService'], ['hist'],
+                                  ['internet_gender_churn.png']),
+    }
+    for feat in BINARY_FEATURES:
+        tasks[f'binary_churn_{feat}'] = (
+            'plot_binary_churn', ([feat],), ['Churn', feat], ['hist', 'bar_colors'],
+            [f'{feat.lower()}_churn.png']
+        )
+    tasks['monthly_total_charges'] = (
+        'plot_monthly_total_charges', (), ['Churn'] + list(PLOT_CONFIG['kde_colors']),
+        ['kde_colors'], [f'{col.lower()}_distribution.png' for col in PLOT_CONFIG['kde_colors']]
+    )
+    tasks['correlation'] = ('plot_correlation', (), None, [], ['correlation_heatmap.png'])
+    return tasks
+
+def task_hash(df, task) -> str:
+    """
+    Hash of everything a plot depends on: its input columns, its
+    PLOT_CONFIG entries and the source of its plotting function.
+    """
+    from src import plots
+
+    func_name, args, columns, config_keys, _ = task
+    data = df if columns is None else df[columns]
+
+    h = hashlib.blake2b(digest_size=16)
+    h.update(json.dumps([func_name, args, list(data.columns), data.dtypes.astype(str).tolist()],
+                        default=str).encode())
+    h.update(pd.util.hash_pandas_object(data, index=False).values.tobytes())
+    h.update(json.dumps({key: PLOT_CONFIG[key] for key in config_keys},
+                        sort_keys=True, default=str).encode())
+    h.update(inspect.getsource(getattr(plots, func_name)).encode())
+    return h.hexdigest()
+
+def _render(func_name, args, data):
+    """
+    Worker: render one plot and return its wall-clock time.
+    """
+    import matplotlib
+    # no display in worker processes
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from src import plots
+
+    start = time.perf_counter()
+    getattr(plots, func_name)(data, *args)
+    plt.close('all')
+    return time.perf_counter() - start
+
+def _load_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def run_plots(df, force=False, workers=PLOT_WORKERS, names=None, cache_path=PLOT_CACHE_PATH):
+    """
+    Render the EDA plots in parallel worker processes, skipping every plot
+    whose input-column hash and PLOT_CONFIG entries match the last render
+    and whose output files are still in outputs/.
+    - df: the EDA DataFrame from load_eda_data
+    - force: re-render every plot
+    - workers: number of worker processes
+    - names: optional subset of plot names to run
+    Prints the time of each plot and returns {name: (status, seconds)}.
+    Raises RuntimeError after all plots ran when any of them failed.
+    """
+    tasks = plot_tasks()
+    if names is not None:
+        tasks = {name: tasks[name] for name in names}
+
+    manifest = _load_manifest(cache_path)
+    report = {}
+    pending = {}
+    for name, task in tasks.items():
+        digest = task_hash(df, task)
+        outputs = [os.path.join(OUTPUT_DIR, f) for f in task[4]]
+        cached = manifest.get(name, {}).get('hash') == digest and all(map(os.path.exists, outputs))
+        if cached and not force:
+            report[name] = ('cached', 0.0)
+        else:
+            pending[name] = digest
+
+    start = time.perf_counter()
+    errors = {}
+    if pending:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as pool:
+            futures = {}
+            for name in pending:
+                func_name, args, columns, _, _ = tasks[name]
+                data = df if columns is None else df[columns]
+                futures[pool.submit(_render, func_name, args, data)] = name
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    seconds = future.result()
+                except Exception as exc:
+                    errors[name] = exc
+                    report[name] = ('failed', 0.0)
+                    manifest.pop(name, None)
+                    continue
+                report[name] = ('rendered', seconds)
+                manifest[name] = {'hash': pending[name], 'files': tasks[name][4], 'seconds': seconds}
+
+    # remember what was rendered, written atomically
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    with open(cache_path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(cache_path + '.tmp', cache_path)
+
+    # per-plot report, in the order of the tasks
+    print(f"\n{'plot':<32} {'status':<9} {'seconds':>8}")
+    for name in tasks:
+        status, seconds = report[name]
+        print(f"{name:<32} {status:<9} {seconds:8.2f}")
+    rendered = sum(status == 'rendered' for status, _ in report.values())
+    print(f"{rendered} rendered, {len(report) - rendered - len(errors)} cached, "
+          f"{len(errors)} failed in {time.perf_counter() - start:.2f}s\n")
+
+    if errors:
+        details = '; '.join(
+            f"{name}: {type(exc).__name__}: {(str(exc).strip().splitlines() or [''])[0]}"
+            for name, exc in errors.items()
+        )
+        raise RuntimeError(f"{len(errors)} plot(s) failed: {details}")
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the EDA plots into outputs/")
+    parser.add_argument('--data', default=DATA_PATH, help="raw CSV")
+    parser.add_argument('--force', action='store_true', help="re-render every plot")
+    parser.add_argument('--workers', type=int, default=PLOT_WORKERS,
+                        help="number of worker processes")
+    parser.add_argument('--only', nargs='+', choices=sorted(plot_tasks()),
+                        help="render only these plots")
+    args = parser.parse_args()
+
+    from src.data import load_eda_data
+    run_plots(load_eda_data(args.data), force=args.force, workers=args.workers, names=args.only)
+
+if __name__ == '__main__':
+    main()
@@ -103,7 +103,7 @@ def plot_payment_method_churn(df):
     save_fig(fig, OUTPUT_DIR + 'payment_method_churn.png')
 
 def plot_internet_gender_churn(df):
-    df_counts = df.groupby(['Churn','gender','InternetService']).size().reset_index(name='count')
+    df_counts = df.groupby(['Churn','gender','InternetService'], observed=True).size().reset_index(name='count')
     cfg = PLOT_CONFIG['hist']
     fig = px.bar(
         df_counts,
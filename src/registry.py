@@ -0,0 +1,247 @@
+import os
+import threading
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.artifacts import MANIFEST, is_array_artifact, load_array_artifact
+from src.compiled import compile_pipeline
+from src.explain import LinearExplainer
+from src.config import COMPILED_SCORER, ARTIFACT_FORMAT
+from src.metrics import stage_timer
+
+class ModelUnavailableError(RuntimeError):
+    """
+    Raised when no model artifact can be loaded.
+    """
+
+class LoadedModel:
+    """
+    One loaded version of the artifacts saved by run_serve.
+    Requests keep a reference to the LoadedModel they started with,
+    so swapping in a new version never affects a request in flight.
+
+    Pickled artifacts carry the sklearn pipeline; array artifacts only
+    carry the compiled scorer, which is then always used.
+    """
+    def __init__(self, artifacts, version=None):
+        self.artifacts = artifacts
+        self.pipeline = artifacts.get('pipeline')
+        self.tenure_bucket = artifacts.get('tenure_bucket')
+        self.version = version
+        self._explainer = None
+
+        # pure-NumPy scorer: from the array artifact, or opt-in from the pipeline
+        # (linear models only, others are scored by the pipeline)
+        self.compiled = artifacts.get('compiled')
+        if self.compiled is None and COMPILED_SCORER and hasattr(self.pipeline[-1], 'coef_'):
+            self.compiled = compile_pipeline(self.pipeline, self.tenure_bucket)
+
+    def version_label(self):
+        """
+        The version as reported: (modification time, size) of an artifact
+        loaded from disk, or the label given to a model passed to set_model.
+        """
+        return self.version[1:] if isinstance(self.version, tuple) else self.version
+
+    def predict_proba(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        df: a DataFrame of raw feature values, one row per customer
+        returns: array of churn probabilities in row order
+        """
+        if self.compiled is not None:
+            with stage_timer('compiled'):
+                return self.compiled.predict_batch(df)
+
+        # tenure -> bucket
+        with stage_timer('tenure_bucket'):
+            X = self.tenure_bucket.transform(df)
+
+        # only transformed features -> array or sparse matrix
+        with stage_timer('preprocess'):
+            X = self.pipeline[:-1].transform(X)
+
+        # feed that into classifier
+        with stage_timer('classify'):
+            return self.pipeline[-1].predict_proba(X)[:, 1]
+
+    @property
+    def explainer(self) -> LinearExplainer:
+        """
+        Closed-form SHAP explainer, built on first use from the compiled
+        scorer and the background means saved with the artifacts.
+        Raises ModelUnavailableError when the artifacts cannot be explained.
+        """
+        if self._explainer is None:
+            compiled = self.compiled
+            if compiled is None:
+                try:
+                    compiled = compile_pipeline(self.pipeline, self.tenure_bucket)
+                except ValueError as exc:
+                    raise ModelUnavailableError(f"model cannot be explained: {exc}")
+            if self.artifacts.get('background_mean') is None:
+                raise ModelUnavailableError(
+                    "model artifact has no explainer background, rerun run_serve"
+                )
+            self._explainer = LinearExplainer(compiled, self.artifacts['background_mean'])
+        return self._explainer
+
+    def predict_records(self, samples: list) -> np.ndarray:
+        """
+        samples: a list of dicts of raw feature values
+        returns: array of churn probabilities in input order
+        """
+        # compiled scorer: a few lookups and a dot product, no DataFrame
+        if self.compiled is not None:
+            with stage_timer('compiled'):
+                return self.compiled.predict_records(samples)
+
+        with stage_timer('frame'):
+            df = pd.DataFrame.from_records(samples)
+        return self.predict_proba(df)
+
+def _file_version(path):
+    """
+    Identify an artifact on disk by path, modification time and size.
+    Array artifacts are identified by their manifest, which is written last,
+    in the version directory their symlink points to.
+    """
+    path = os.path.realpath(str(path))
+    st = os.stat(os.path.join(path, MANIFEST) if os.path.isdir(path) else path)
+    return (path, st.st_mtime_ns, st.st_size)
+
+def load_model(path) -> LoadedModel:
+    """
+    Load the artifacts at path into a LoadedModel.
+    - path: a joblib pickle or an array artifact directory
+    """
+    if not os.path.exists(path):
+        raise ModelUnavailableError(f"no model artifact at {path}")
+    # read the version and the files from the same directory, even if it is swapped meanwhile
+    path = os.path.realpath(str(path))
+    version = _file_version(path)
+
+    # array artifact: memory-mapped, shared between worker processes
+    if is_array_artifact(path):
+        scorer, manifest = load_array_artifact(path, mmap_mode='r')
+        return LoadedModel(dict(manifest, compiled=scorer), version)
+
+    return LoadedModel(joblib.load(path), version)
+
+class ModelRegistry:
+    """
+    Process-wide holder of the current model.
+
+    The artifact is loaded once, on first use or at warm_up(), and shared
+    by every caller. A background watcher can poll the artifact file and
+    atomically swap in a new version without restarting the process.
+
+    When array_path is given and holds an array artifact it is preferred
+    over the pickle, unless ARTIFACT_FORMAT says otherwise.
+    """
+    def __init__(self, path, array_path=None):
+        self.path = str(path)
+        self.array_path = str(array_path) if array_path else None
+        self._model = None
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+
+    def source(self) -> str:
+        """
+        Path of the artifact to load, following ARTIFACT_FORMAT.
+        """
+        if self.array_path and ARTIFACT_FORMAT == 'arrays':
+            return self.array_path
+        if (self.array_path and ARTIFACT_FORMAT == 'auto'
+                and is_array_artifact(self.array_path)):
+            return self.array_path
+        return self.path
+
+    def get(self) -> LoadedModel:
+        """
+        Return the current model, loading it on first use.
+        """
+        model = self._model
+        if model is None:
+            with self._lock:
+                # another thread may have loaded it while we waited
+                if self._model is None:
+                    self._model = load_model(self.source())
+                model = self._model
+        return model
+
+    def current(self):
+        """
+        The model currently served, or None before the first load.
+        Never loads it.
+        """
+        return self._model
+
+    def set_model(self, model: LoadedModel):
+        """
+        Serve an already loaded model, e.g. one trained in-process.
+        """
+        with self._lock:
+            self._model = model
+
+    def warm_up(self) -> LoadedModel:
+        """
+        Load the model now instead of on the first request.
+        """
+        return self.get()
+
+    def reload_if_changed(self) -> bool:
+        """
+        Load the artifact again if the file changed on disk.
+        Returns True when a new version was swapped in.
+        """
+        # one reload at a time
+        with self._reload_lock:
+            source = self.source()
+            try:
+                version = _file_version(source)
+            except FileNotFoundError:
+                return False
+            current = self._model
+            if current is not None and current.version == version:
+                return False
+
+            # load outside the lock, requests keep using the current model meanwhile
+            model = load_model(source)
+            with self._lock:
+                self._model = model
+            print(f"Loaded model artifact {source} (version {model.version_label()})")
+            return True
+
+    def _watch(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.reload_if_changed()
+            except Exception as exc:
+                # a half-written or broken file: keep serving the current model
+                print(f"Model reload failed, keeping current version: {exc}")
+
+    def start_watching(self, interval=5.0):
+        """
+        Poll the artifact file every interval seconds in a daemon thread.
+        """
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval,),
+            name="model-registry-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watching(self):
+        """
+        Stop the background watcher.
+        """
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
@@ -0,0 +1,258 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.metrics import observe_stage
+
+# name of the model loaded from the default artifact paths
+PRIMARY = 'primary'
+
+def parse_pairs(text, variable, convert=str) -> dict:
+    """
+    Parse comma-separated name=value pairs from the environment variable
+    `variable`, e.g. CHURN_ROUTE_PERCENT=candidate=10,other=5.
+    - convert: applied to every value
+    Raises ValueError naming the variable for a malformed entry.
+    """
+    pairs = {}
+    for item in text.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        name, sep, value = (part.strip() for part in item.partition('='))
+        if not sep or not name or not value:
+            raise ValueError(f"{variable}: expected name=value, got {item!r}")
+        try:
+            pairs[name] = convert(value)
+        except ValueError:
+            raise ValueError(f"{variable}: invalid value {value!r} for {name!r}") from None
+    return pairs
+
+class UnknownModelVersionError(KeyError):
+    """
+    Raised when a request asks for a model version that is not loaded.
+    """
+
+class ShadowStats:
+    """
+    Running comparison of one shadow model against the primary on the
+    same customers: score differences, decision agreement and the
+    correlation of the two scores, from sums only (constant memory).
+    """
+    # upper bounds of the absolute score difference histogram
+    DIFF_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.agree = 0
+        self.sums = np.zeros(5) # x, y, x^2, y^2, x*y
+        self.abs_diff_sum = 0.0
+        self.max_abs_diff = 0.0
+        self.diff_counts = np.zeros(len(self.DIFF_BUCKETS), dtype=np.int64)
+        self.batches = 0
+        self.seconds = 0.0
+
+    def update(self, primary, shadow, seconds):
+        primary = np.asarray(primary, dtype=float)
+        shadow = np.asarray(shadow, dtype=float)
+        diff = np.abs(shadow - primary)
+        sums = np.array([
+            primary.sum(), shadow.sum(), (primary ** 2).sum(),
+            (shadow ** 2).sum(), (primary * shadow).sum()
+        ])
+        buckets = np.bincount(
+            np.searchsorted(self.DIFF_BUCKETS, diff), minlength=len(self.DIFF_BUCKETS)
+        )[:len(self.DIFF_BUCKETS)]
+        with self._lock:
+            self.count += len(diff)
+            self.agree += int(((primary >= 0.5) == (shadow >= 0.5)).sum())
+            self.sums += sums
+            self.abs_diff_sum += float(diff.sum())
+            self.max_abs_diff = max(self.max_abs_diff, float(diff.max(initial=0.0)))
+            self.diff_counts += buckets
+            self.batches += 1
+            self.seconds += seconds
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            n = self.count
+            if n == 0:
+                return {'customers': 0}
+            sx, sy, sxx, syy, sxy = self.sums
+            cov = sxy / n - sx * sy / n ** 2
+            var_x, var_y = sxx / n - (sx / n) ** 2, syy / n - (sy / n) ** 2
+            return {
+                'customers': n,
+                'batches': self.batches,
+                'mean_primary': sx / n,
+                'mean_shadow': sy / n,
+                'mean_abs_diff': self.abs_diff_sum / n,
+                'max_abs_diff': self.max_abs_diff,
+                'decision_agreement': self.agree / n,
+                'correlation': cov / np.sqrt(var_x * var_y) if var_x > 0 and var_y > 0 else None,
+                'abs_diff_histogram': {
+                    f'le_{bound:g}': int(c) for bound, c in zip(self.DIFF_BUCKETS, np.cumsum(self.diff_counts))
+                },
+                'mean_seconds_per_batch': self.seconds / self.batches,
+            }
+
+class ModelRouter:
+    """
+    Several model versions loaded side by side, each from its own
+    ModelRegistry (so each reloads on its own when its artifact changes).
+
+    - routing: a request names its version (X-Model-Version header), or
+      `percentages` send that share of the other requests to a version;
+      the rest goes to the primary
+    - shadow: after a batch was scored by the primary, the same validated
+      customers are scored by every shadow version in one background
+      thread, so the response never waits for them; the comparison is
+      kept in a ShadowStats per shadow version. Batches that queue up
+      while the thread is busy are scored together in one call. When more
+      than max_pending batches are waiting, new ones are dropped (and
+      counted) rather than queued without bound.
+    """
+    def __init__(self, primary, versions=None, shadows=(), percentages=None, max_pending=64):
+        self.registries = {PRIMARY: primary, **(versions or {})}
+        unknown = (set(shadows) | set(percentages or {})) - set(self.registries)
+        if unknown:
+            raise ValueError(f"unknown model versions: {', '.join(sorted(unknown))}")
+        if any(percent < 0 for percent in (percentages or {}).values()):
+            raise ValueError("routing percentages must not be negative")
+        if sum((percentages or {}).values()) > 100:
+            raise ValueError("routing percentages add up to more than 100")
+        self.shadows = [name for name in shadows if name != PRIMARY]
+        self.percentages = dict(percentages or {})
+        self.stats = {name: ShadowStats() for name in self.shadows}
+        self.max_pending = max_pending
+        self.routed = {name: 0 for name in self.registries}
+        self.dropped = 0
+        self._queue = []
+        self._draining = False
+        self._lock = threading.Lock()
+        self._random = random.Random()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='shadow') if self.shadows else None
+
+    def route(self, requested=None) -> str:
+        """
+        Name of the version that scores a request.
+        Raises UnknownModelVersionError for a requested version that is not loaded.
+        """
+        if requested:
+            if requested not in self.registries:
+                raise UnknownModelVersionError(requested)
+            name = requested
+        else:
+            name = PRIMARY
+            draw = self._random.random() * 100
+            for version, percent in self.percentages.items():
+                if draw < percent:
+                    name = version
+                    break
+                draw -= percent
+        with self._lock:
+            self.routed[name] += 1
+        return name
+
+    def get(self, name=PRIMARY):
+        return self.registries[name].get()
+
+    def shadow(self, name, samples, probas):
+        """
+        Score samples with every shadow version in the background and compare
+        against probas from version name. Returns immediately.
+        """
+        if self._executor is None or not samples or name != PRIMARY:
+            return
+        with self._lock:
+            if len(self._queue) >= self.max_pending:
+                self.dropped += 1
+                return
+            self._queue.append((samples, probas))
+            if self._draining:
+                return
+            self._draining = True
+        self._executor.submit(self._score_shadows)
+
+    def _score_shadows(self):
+        with self._lock:
+            queued, self._queue, self._draining = self._queue, [], False
+        samples = [sample for batch, _ in queued for sample in batch]
+        probas = np.concatenate([np.asarray(p, dtype=float) for _, p in queued])
+        # one frame for all shadow versions that score through the pipeline
+        frame = None
+        for name in self.shadows:
+            try:
+                model = self.get(name)
+                start = time.perf_counter()
+                if model.compiled is not None:
+                    shadow = model.compiled.predict_records(samples)
+                else:
+                    if frame is None:
+                        frame = pd.DataFrame.from_records(samples)
+                    shadow = model.predict_proba(frame)
+                seconds = time.perf_counter() - start
+                observe_stage('shadow', seconds)
+                self.stats[name].update(probas, shadow, seconds)
+            except Exception as exc:
+                # a broken shadow model must never affect serving
+                print(f"Shadow scoring with {name!r} failed: {exc}")
+
+    def wait(self):
+        """
+        Block until every queued shadow batch has been scored.
+        """
+        if self._executor is not None:
+            self._executor.submit(lambda: None).result()
+
+    def versions(self) -> dict:
+        """
+        Loaded versions with their artifact and load state.
+        """
+        out = {}
+        for name, registry in self.registries.items():
+            model = registry.current()
+            out[name] = {
+                'path': registry.source(),
+                'loaded': model is not None,
+                'version': model.version_label() if model is not None else None,
+                'shadow': name in self.shadows,
+                'percent': self.percentages.get(name, 0),
+            }
+        return out
+
+    def stats_snapshot(self) -> dict:
+        with self._lock:
+            routed, dropped, pending = dict(self.routed), self.dropped, len(self._queue)
+        return {
+            'routed_requests': routed,
+            'shadow_batches_dropped': dropped,
+            'shadow_batches_pending': pending,
+            'shadow': {name: stats.snapshot() for name, stats in self.stats.items()},
+        }
+
+    def warm_up(self):
+        """
+        Load every version now; returns {name: error message} for those
+        that could not be loaded yet.
+        """
+        errors = {}
+        for name, registry in self.registries.items():
+            try:
+                registry.warm_up()
+            except Exception as exc:
+                errors[name] = str(exc)
+        return errors
+
+    def start_watching(self, interval):
+        for registry in self.registries.values():
+            registry.start_watching(interval)
+
+    def stop_watching(self):
+        for registry in self.registries.values():
+            registry.stop_watching()
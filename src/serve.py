@@ -1,42 +1,94 @@
+import os
 import joblib
 from src.data import load_data, split_data
 from src.features import TenureBucket
 from src.model import build_pipeline
-from src.config import DATA_PATH
+from src.compiled import compile_pipeline, check_parity
+from src.explain import background_mean
+from src.artifacts import save_array_artifact, remove_directory
+from src.config import DATA_PATH, ARTIFACT_PATH, ARRAY_ARTIFACT_PATH, MODEL_BACKEND
 
-def run_serve():
+def run_serve(X_raw=None, y_train=None, total_charges_mean=None,
+              pipeline=None, tenure_bucket=None, model=MODEL_BACKEND):
     """
     Train the final churn prediction model on all available data
     and save both the trained pipeline and the tenure bucket transformer.
+    When called from the stage graph in src/main.py, the data and model
+    already computed there are reused instead of loading and retraining:
+    - X_raw, y_train: raw training features and labels from split_data
+    - total_charges_mean: mean TotalCharges of the full dataset
+    - pipeline: the pipeline already fitted on X_raw, y_train
+    - tenure_bucket: the TenureBucket that pipeline was fitted with
+    - model: backend passed to build_pipeline when pipeline is None
+    Only linear models are compiled and saved as an array artifact;
+    for other models a stale array artifact is removed so inference
+    falls back to the pickle.
     """
-    # Load and clean the full dataset
-    df = load_data(DATA_PATH)
+    if X_raw is None:
+        # Load and clean the full dataset
+        df = load_data(DATA_PATH)
+        total_charges_mean = float(df['TotalCharges'].mean())
 
-    # Split into training features and labels, discard the test portion
-    X_train, _, y_train, _ = split_data(df)
+        # Split into training features and labels, discard the test portion
+        X_raw, _, y_train, _ = split_data(df)
 
     # Apply the custom tenure bucketing transformer
-    tb = TenureBucket()
-    X_train = tb.fit_transform(X_train)
+    tb = tenure_bucket if tenure_bucket is not None else TenureBucket(mode='codes')
+    X_train = tb.fit_transform(X_raw)
 
-    # Identify numeric and categorical columns
-    numeric_cols     = ['tenure', 'MonthlyCharges', 'TotalCharges']
-    categorical_cols = [c for c in X_train.columns if c not in numeric_cols]
+    if pipeline is None:
+        # Identify numeric and categorical columns
+        numeric_cols     = ['tenure', 'MonthlyCharges', 'TotalCharges']
+        categorical_cols = [c for c in X_train.columns if c not in numeric_cols]
 
-    # Build the preprocessing + classifier pipeline
-    pipeline = build_pipeline(categorical_cols, numeric_cols)
+        # Build the preprocessing + classifier pipeline
+        pipeline = build_pipeline(categorical_cols, numeric_cols, model=model)
 
-    # Train the pipeline on the full training set
-    pipeline.fit(X_train, y_train)
+        # Train the pipeline on the full training set
+        pipeline.fit(X_train, y_train)
 
-    # Save the trained pipeline and transformer for later inference
+    linear = hasattr(pipeline.named_steps['clf'], 'coef_')
+    scorer, background = None, None
+    if linear:
+        # Make sure the compiled NumPy scorer reproduces the pipeline exactly
+        scorer = compile_pipeline(pipeline, tb)
+        max_diff = check_parity(scorer, pipeline, tb, X_raw)
+        print(f"Compiled scorer parity: max |diff| = {max_diff:.2e}")
+
+        # interventional SHAP background for /explain: mean of the training matrix
+        background = background_mean(pipeline, tb, X_raw)
+
+    # Save the trained pipeline and transformer for later inference.
+    # Write to a temporary file first so a running API never reads a half-written artifact
     joblib.dump(
         {
             'pipeline': pipeline,
-            'tenure_bucket': tb
+            'tenure_bucket': tb,
+            # used to fill missing TotalCharges when scoring new data in chunks
+            'total_charges_mean': total_charges_mean,
+            'background_mean': background,
+            # penalty scale when src/incremental.py updates this model with new rows
+            'training_rows': len(y_train)
         },
-        'outputs/churn_model_artifacts.pkl'
+        ARTIFACT_PATH + '.tmp'
+    )
+    os.replace(ARTIFACT_PATH + '.tmp', ARTIFACT_PATH)
+
+    if not linear:
+        # the arrays of an earlier linear model would otherwise be served instead
+        remove_directory(ARRAY_ARTIFACT_PATH)
+        print(f"Model and transformer saved to {ARTIFACT_PATH} "
+              f"(no array artifact for {type(pipeline.named_steps['clf']).__name__})")
+        return
+
+    # Save the same model as memory-mappable arrays for fast cold start
+    save_array_artifact(
+        scorer, ARRAY_ARTIFACT_PATH,
+        extra={
+            'total_charges_mean': total_charges_mean,
+            'background_mean': background
+        }
     )
 
     # Confirm completion
-    print("Model and transformer saved to outputs/churn_model_artifacts.pkl")
+    print(f"Model and transformer saved to {ARTIFACT_PATH} and {ARRAY_ARTIFACT_PATH}")
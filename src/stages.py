@@ -0,0 +1,217 @@
+import glob
+import hashlib
+import importlib.util
+import inspect
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import joblib
+
+from src.config import CACHE_DIR, STAGE_WORKERS
+
+# results of every stage, one file per stage and cache key
+STAGE_CACHE_DIR = os.path.join(CACHE_DIR, 'stages')
+
+class Stage:
+    """
+    One step of the training workflow.
+    - name: unique stage name
+    - func: called as func(**inputs, **params, **resources)
+    - inputs: names of the stages whose results func takes, by stage name
+    - params: JSON-serializable parameters, part of the cache key
+    - files: input files whose contents are part of the cache key
+    - code: names of modules whose source is part of the cache key, besides
+      the source of func itself; they are read from disk, not imported,
+      so declaring a stage never loads heavy libraries
+    - outputs: files the stage writes; the stage reruns when one is missing
+    - resources: names of shared run-time objects passed to func that are
+      not part of the cache key (e.g. the preprocessing cache)
+    - cache: set to False to rerun the stage on every run
+    """
+    def __init__(self, name, func, inputs=(), params=None, files=(), code=(),
+                 outputs=(), resources=(), cache=True):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.params = dict(params or {})
+        self.files = list(files)
+        self.code = list(code)
+        self.outputs = list(outputs)
+        self.resources = list(resources)
+        self.cache = cache
+
+def _file_digest(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def stage_key(stage, upstream_keys) -> str:
+    """
+    Content hash of a stage: its parameters, input files, source code
+    and the keys of the stages it reads. A change anywhere upstream
+    therefore changes the key of every stage below it.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(json.dumps(
+        [stage.name, stage.params, [upstream_keys[name] for name in stage.inputs]],
+        sort_keys=True, default=repr
+    ).encode())
+    for path in stage.files:
+        h.update(_file_digest(path).encode())
+    h.update(inspect.getsource(stage.func).encode())
+    for module in stage.code:
+        with open(importlib.util.find_spec(module).origin, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+def _topological(stages):
+    by_name = {stage.name: stage for stage in stages}
+    order, seen = [], set()
+
+    def visit(stage, path=()):
+        if stage.name in seen:
+            return
+        if stage.name in path:
+            raise ValueError(f"stage cycle: {' -> '.join(path + (stage.name,))}")
+        for name in stage.inputs:
+            if name not in by_name:
+                raise ValueError(f"stage {stage.name!r} reads unknown stage {name!r}")
+            visit(by_name[name], path + (stage.name,))
+        seen.add(stage.name)
+        order.append(stage)
+
+    for stage in stages:
+        visit(stage)
+    return order
+
+def run_stages(stages, force=(), resources=None, workers=STAGE_WORKERS,
+               cache_dir=STAGE_CACHE_DIR, targets=None):
+    """
+    Run a graph of stages, recomputing only what changed.
+
+    A stage reruns when its cache key has no stored result, when one of its
+    output files is missing, or when it is named in force; everything
+    downstream of a rerun stage reruns too (a changed stage gives its
+    dependents new keys, a forced one does not, so they are added here). Cached
+    results are only read from disk when a rerunning stage needs them.
+    Stages whose inputs are ready run concurrently on `workers` threads,
+    so independent branches (e.g. EDA and modeling) overlap.
+    - stages: list of Stage
+    - force: stage names to rerun regardless of the cache ('all' for every stage)
+    - resources: dict of shared objects handed to stages that ask for them
+    - targets: only run these stages and what they depend on (default: all)
+    Prints a timing summary and returns {stage name: result} for the
+    stages that ran or were loaded.
+    """
+    stages = _topological(stages)
+    if targets is not None:
+        stages = _upstream(stages, targets)
+    resources = resources or {}
+    force = {stage.name for stage in stages} if 'all' in force else set(force)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    keys, run = {}, set()
+    for stage in stages:
+        keys[stage.name] = stage_key(stage, keys)
+        fresh = (
+            stage.cache
+            and stage.name not in force
+            and os.path.exists(_cache_path(cache_dir, stage, keys[stage.name]))
+            and all(os.path.exists(path) for path in stage.outputs)
+        )
+        # a rerun stage produces a new result, so every stage reading it reruns
+        # too (in topological order, its inputs have already been decided)
+        if not fresh or any(name in run for name in stage.inputs):
+            run.add(stage.name)
+
+    # cached stages are loaded only when a stage that runs reads them
+    load = {name for stage in stages if stage.name in run for name in stage.inputs} - run
+    todo = [stage for stage in stages if stage.name in run or stage.name in load]
+
+    results, report = {}, {stage.name: ('cached', 0.0) for stage in stages}
+    lock = threading.Lock()
+    start = time.perf_counter()
+
+    def execute(stage):
+        t0 = time.perf_counter()
+        path = _cache_path(cache_dir, stage, keys[stage.name])
+        if stage.name in load:
+            value = joblib.load(path)
+            status = 'loaded'
+        else:
+            with lock:
+                kwargs = {name: results[name] for name in stage.inputs}
+            kwargs.update(stage.params)
+            kwargs.update({name: resources[name] for name in stage.resources})
+            value = stage.func(**kwargs)
+            if stage.cache:
+                _store(cache_dir, stage, path, value)
+            status = 'ran'
+        return value, status, time.perf_counter() - t0
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+        remaining = list(todo)
+        while remaining or pending:
+            # submit every stage whose inputs are available
+            # (a cached result is loaded without its inputs)
+            for stage in list(remaining):
+                if stage.name in load or all(name in results for name in stage.inputs):
+                    remaining.remove(stage)
+                    pending[pool.submit(execute, stage)] = stage
+            if not pending:
+                # nothing running and nothing can start: an input is never produced
+                raise RuntimeError(
+                    "stages cannot run, their inputs are never produced: "
+                    + ', '.join(stage.name for stage in remaining)
+                )
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = pending.pop(future)
+                # let a failing stage stop the run with its own traceback
+                value, status, seconds = future.result()
+                with lock:
+                    results[stage.name] = value
+                report[stage.name] = (status, seconds)
+
+    _print_summary(stages, report, time.perf_counter() - start)
+    return results
+
+def _upstream(stages, targets):
+    # the targets and every stage they read from, in topological order
+    by_name = {stage.name: stage for stage in stages}
+    unknown = set(targets) - set(by_name)
+    if unknown:
+        raise ValueError(f"unknown stages: {', '.join(sorted(unknown))}")
+    needed, todo = set(), list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in needed:
+            needed.add(name)
+            todo.extend(by_name[name].inputs)
+    return [stage for stage in stages if stage.name in needed]
+
+def _cache_path(cache_dir, stage, key):
+    return os.path.join(cache_dir, f"{stage.name}-{key}.joblib")
+
+def _store(cache_dir, stage, path, value):
+    # write atomically, then drop results of older keys of this stage
+    joblib.dump(value, path + '.tmp')
+    os.replace(path + '.tmp', path)
+    for old in glob.glob(os.path.join(cache_dir, f"{stage.name}-*.joblib")):
+        if old != path:
+            os.remove(old)
+
+def _print_summary(stages, report, wall):
+    print(f"\n{'stage':<16} {'status':<7} {'seconds':>8}")
+    for stage in stages:
+        status, seconds = report[stage.name]
+        print(f"{stage.name:<16} {status:<7} {seconds:8.2f}")
+    busy = sum(seconds for _, seconds in report.values())
+    ran = sum(status == 'ran' for status, _ in report.values())
+    print(f"{ran} of {len(stages)} stages ran; {busy:.2f}s of stage time in {wall:.2f}s wall-clock\n")
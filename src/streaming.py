@@ -0,0 +1,105 @@
+import orjson
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body is produced while the request body is
+    still being read. The stock one listens for a client disconnect on
+    the same receive channel on ASGI servers before spec 2.4, which takes
+    the request body chunks away from the endpoint; here the request
+    stream itself raises ClientDisconnect instead.
+    """
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
+
+async def iter_ndjson_lines(chunks, max_line_bytes):
+    """
+    Split an async stream of body chunks into NDJSON lines as they arrive.
+    Yields (index, line) per non-empty line, with line None when it was
+    longer than max_line_bytes. Only the current partial line is buffered,
+    and at most max_line_bytes of it.
+    """
+    buffer = bytearray()
+    index = 0
+    too_long = False
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b'\n', start)
+            if end == -1:
+                # no newline yet: keep the rest of the chunk, up to the limit
+                if not too_long:
+                    buffer += chunk[start:]
+                    if len(buffer) > max_line_bytes:
+                        too_long = True
+                        buffer.clear()
+                break
+            if not too_long:
+                buffer += chunk[start:end]
+                too_long = len(buffer) > max_line_bytes
+            line = None if too_long else bytes(buffer).strip()
+            if line is None or line:
+                yield index, line
+                index += 1
+            buffer.clear()
+            too_long = False
+            start = end + 1
+
+    # last line without a trailing newline
+    if too_long or len(buffer) > max_line_bytes:
+        yield index, None
+    elif buffer.strip():
+        yield index, bytes(buffer).strip()
+
+async def score_ndjson(chunks, schema, predict_batch, batch_size, max_line_bytes):
+    """
+    Score an NDJSON stream of customers in micro-batches of batch_size and
+    yield the results as NDJSON, one line per input line in input order:
+    {"index", "churn_probability", "conclusion"}, or {"index", "error"} for
+    a line that is not valid JSON or does not match schema.
+
+    The body is only read while results are being sent: when the client
+    reads slowly, the server stops reading its request too, so memory per
+    connection stays at one batch whatever the stream length.
+    - chunks: async iterator of body bytes (request.stream())
+    - schema: pydantic model each line is validated against
+    - predict_batch: list of dicts -> list of result dicts, run in a worker thread
+    """
+    pending = []
+
+    async def flush():
+        rows = [row for _, row, _ in pending if row is not None]
+        scored = iter(await run_in_threadpool(predict_batch, rows)) if rows else iter(())
+        out = bytearray()
+        for index, row, error in pending:
+            result = {"index": index, **next(scored)} if row is not None else {"index": index, "error": error}
+            out += orjson.dumps(result)
+            out += b'\n'
+        pending.clear()
+        return bytes(out)
+
+    async for index, line in iter_ndjson_lines(chunks, max_line_bytes):
+        if line is None:
+            pending.append((index, None, f"line longer than {max_line_bytes} bytes"))
+        else:
+            try:
+                pending.append((index, schema.model_validate(orjson.loads(line)).model_dump(), None))
+            except orjson.JSONDecodeError as exc:
+                pending.append((index, None, f"invalid JSON: {exc}"))
+            except ValidationError as exc:
+                pending.append((index, None, exc.errors(include_url=False, include_context=False)))
+        if len(pending) >= batch_size:
+            yield await flush()
+
+    if pending:
+        yield await flush()
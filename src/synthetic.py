@@ -0,0 +1,243 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.config import DATA_PATH
+from src.data import load_data
+from src.features import TenureBucket
+
+# each categorical column is sampled conditionally on its parent columns,
+# which keeps the joint structure of the real data, e.g. add-on services
+# are 'No internet service' exactly when InternetService is 'No', and
+# long-tenure customers carry more add-ons
+PARENTS = {
+    'Churn': (),
+    'gender': (),
+    'SeniorCitizen': ('Churn',),
+    'Contract': ('Churn',),
+    'TenureBucket': ('Contract', 'Churn'),
+    'InternetService': ('Churn', 'Contract', 'TenureBucket'),
+    'PaymentMethod': ('Churn', 'Contract'),
+    'PaperlessBilling': ('Churn', 'InternetService'),
+    'Partner': ('SeniorCitizen', 'TenureBucket'),
+    'Dependents': ('Partner',),
+    'PhoneService': ('InternetService',),
+    'MultipleLines': ('PhoneService', 'TenureBucket'),
+    'OnlineSecurity': ('InternetService', 'TenureBucket', 'Churn'),
+    'OnlineBackup': ('InternetService', 'TenureBucket', 'Churn'),
+    'DeviceProtection': ('InternetService', 'TenureBucket', 'Churn'),
+    'TechSupport': ('InternetService', 'TenureBucket', 'Churn'),
+    'StreamingTV': ('InternetService', 'TenureBucket', 'Churn'),
+    'StreamingMovies': ('InternetService', 'StreamingTV', 'TenureBucket'),
+}
+
+# exact tenure is drawn from the observed values of this group
+TENURE_GROUP = ('TenureBucket', 'Contract', 'Churn')
+
+# the monthly bill is a sum of per-service prices
+CHARGES_COLS = (
+    'PhoneService', 'MultipleLines', 'InternetService', 'OnlineSecurity',
+    'OnlineBackup', 'DeviceProtection', 'TechSupport', 'StreamingTV', 'StreamingMovies'
+)
+
+# column order of the real CSV
+COLUMNS = [
+    'customerID', 'gender', 'SeniorCitizen', 'Partner', 'Dependents', 'tenure',
+    'PhoneService', 'MultipleLines', 'InternetService', 'OnlineSecurity',
+    'OnlineBackup', 'DeviceProtection', 'TechSupport', 'StreamingTV',
+    'StreamingMovies', 'Contract', 'PaperlessBilling', 'PaymentMethod',
+    'MonthlyCharges', 'TotalCharges', 'Churn'
+]
+
+def _group_codes(codes, cols, cardinality):
+    """
+    Combine the codes of several columns into one group code per row.
+    """
+    group = np.zeros(len(next(iter(codes.values()))), dtype=np.int64)
+    for col in cols:
+        group = group * cardinality[col] + codes[col]
+    return group
+
+class SyntheticCustomers:
+    """
+    Generative model of telco customers learned from the real CSV.
+    - categoricals: conditional frequency tables along PARENTS
+    - tenure: empirical distribution per (tenure bucket, Contract, Churn)
+    - MonthlyCharges: least-squares price per subscribed service plus
+      normal residuals, clipped to the observed range
+    - TotalCharges: tenure * MonthlyCharges * an empirical billing ratio
+    """
+    def __init__(self, df: pd.DataFrame):
+        df = df.copy()
+        df['Churn'] = df['Churn'].map({0: 'No', 1: 'Yes'})
+        df = TenureBucket().fit_transform(df)
+
+        # vocabulary and integer codes of every categorical column
+        self.categories = {}
+        codes = {}
+        for col in PARENTS:
+            cat = pd.Categorical(df[col])
+            self.categories[col] = cat.categories.to_numpy()
+            codes[col] = cat.codes.astype(np.int64)
+        self.cardinality = {col: len(c) for col, c in self.categories.items()}
+
+        # cumulative conditional probabilities: one row per parent combination
+        self.cdfs = {}
+        for col, parents in PARENTS.items():
+            n_groups = int(np.prod([self.cardinality[p] for p in parents])) if parents else 1
+            group = _group_codes(codes, parents, self.cardinality) if parents else np.zeros(len(df), dtype=np.int64)
+            counts = np.zeros((n_groups, self.cardinality[col]))
+            np.add.at(counts, (group, codes[col]), 1)
+            # parent combinations never seen in the data fall back to the marginal
+            marginal = counts.sum(axis=0)
+            counts[counts.sum(axis=1) == 0] = marginal
+            self.cdfs[col] = np.cumsum(counts / counts.sum(axis=1, keepdims=True), axis=1)
+
+        # tenure: sorted observed values per group for inverse-CDF sampling
+        group = _group_codes(codes, TENURE_GROUP, self.cardinality)
+        tenure = df['tenure'].to_numpy()
+        self.tenure_values = {g: np.sort(tenure[group == g]) for g in np.unique(group)}
+        self.tenure_all = np.sort(tenure)
+
+        # monthly charges: one price per (service column, category) by least squares
+        design = np.hstack([
+            np.eye(self.cardinality[col])[codes[col]] for col in CHARGES_COLS
+        ])
+        charges = df['MonthlyCharges'].to_numpy()
+        prices, *_ = np.linalg.lstsq(design, charges, rcond=None)
+        self.prices, start = {}, 0
+        for col in CHARGES_COLS:
+            self.prices[col] = prices[start:start + self.cardinality[col]]
+            start += self.cardinality[col]
+        self.charges_std = (charges - design @ prices).std()
+        self.charges_range = (charges.min(), charges.max())
+
+        # ratio between billed total and tenure * monthly charge
+        ratio = df['TotalCharges'] / (df['tenure'] * df['MonthlyCharges'])
+        self.billing_ratio = np.sort(ratio.clip(0.5, 1.5).to_numpy())
+
+    def _sample_categorical(self, rng, n):
+        codes = {}
+        for col, parents in PARENTS.items():
+            group = _group_codes(codes, parents, self.cardinality) if parents else np.zeros(n, dtype=np.int64)
+            cdf = self.cdfs[col][group]
+            u = rng.random(n)[:, None]
+            codes[col] = np.minimum((u > cdf).sum(axis=1), self.cardinality[col] - 1)
+        return codes
+
+    def _sample_grouped(self, rng, group, values_by_group, fallback):
+        """
+        Inverse-CDF sampling from the empirical distribution of each group.
+        """
+        out = np.empty(len(group))
+        for g in np.unique(group):
+            mask = group == g
+            values = values_by_group.get(g, fallback)
+            out[mask] = values[rng.integers(0, len(values), size=mask.sum())]
+        return out
+
+    def sample(self, n, rng, start_id=0) -> pd.DataFrame:
+        """
+        Draw n synthetic customers with the schema of the real CSV.
+        - start_id: index of the first customer, used to build unique customerIDs
+        """
+        codes = self._sample_categorical(rng, n)
+
+        # tenure conditional on contract and churn
+        group = _group_codes(codes, TENURE_GROUP, self.cardinality)
+        tenure = self._sample_grouped(rng, group, self.tenure_values, self.tenure_all).astype(np.int64)
+
+        # monthly charges: sum of the service prices plus noise
+        monthly = sum(self.prices[col][codes[col]] for col in CHARGES_COLS)
+        monthly = monthly + rng.normal(0.0, self.charges_std, size=n)
+        monthly = np.round(np.clip(monthly, *self.charges_range), 2)
+
+        # total charges follow tenure and the monthly bill
+        ratio = self.billing_ratio[rng.integers(0, len(self.billing_ratio), size=n)]
+        total = np.round(tenure * monthly * ratio, 2)
+
+        columns = {
+            col: pd.Categorical.from_codes(codes[col], categories=self.categories[col])
+            for col in PARENTS
+        }
+        columns.update({
+            'customerID': _customer_ids(start_id, n),
+            'tenure': tenure,
+            'MonthlyCharges': monthly,
+            'TotalCharges': total
+        })
+        return pd.DataFrame(columns)[COLUMNS]
+
+def _customer_ids(start, n):
+    """
+    Unique IDs in the format of the real data, e.g. '0001-ABCDE'.
+    """
+    idx = np.arange(start, start + n, dtype=np.int64)
+    chars = np.empty((n, 10), dtype=np.uint8)
+    digits, rest = np.divmod(idx, 26 ** 5)
+    for i in range(4):
+        chars[:, 3 - i] = ord('0') + digits % 10
+        digits //= 10
+    chars[:, 4] = ord('-')
+    for i in range(5):
+        chars[:, 9 - i] = ord('A') + rest % 26
+        rest //= 26
+    return chars.view('S10').ravel().astype(str)
+
+def generate(n_rows, output_path, source_path=DATA_PATH, chunksize=1_000_000, seed=42):
+    """
+    Stream n_rows synthetic customers to a CSV or Parquet file in chunks.
+    Memory stays bounded by chunksize whatever the total row count,
+    and the same seed and chunksize always produce the same file.
+    """
+    model = SyntheticCustomers(load_data(source_path))
+    rng = np.random.default_rng(seed)
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+
+    parquet = output_path.endswith('.parquet')
+    writer = None
+    start = time.perf_counter()
+
+    try:
+        for offset in range(0, n_rows, chunksize):
+            n = min(chunksize, n_rows - offset)
+            chunk = model.sample(n, rng, start_id=offset)
+
+            if parquet:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema)
+                writer.write_table(table)
+            else:
+                chunk.to_csv(output_path, mode='w' if offset == 0 else 'a',
+                             header=offset == 0, index=False)
+
+            done = offset + n
+            rate = done / (time.perf_counter() - start)
+            print(f"{done:,} / {n_rows:,} rows ({rate:,.0f} rows/s)")
+    finally:
+        if writer is not None:
+            writer.close()
+
+    print(f"Synthetic data saved to {output_path}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic telco customers learned from the real CSV."
+    )
+    parser.add_argument('--rows', type=int, required=True, help="number of customers")
+    parser.add_argument('--output', required=True, help="target .csv or .parquet file")
+    parser.add_argument('--source', default=DATA_PATH, help="real CSV to learn from")
+    parser.add_argument('--chunksize', type=int, default=1_000_000, help="rows per chunk")
+    parser.add_argument('--seed', type=int, default=42, help="random seed")
+    args = parser.parse_args(argv)
+
+    generate(args.rows, args.output, args.source, args.chunksize, args.seed)
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,59 @@
-from sklearn.model_selection import RandomizedSearchCV
+import math
+import time
 
-def tune_pipeline(pipeline, param_dist, X, y, n_iter=20, cv=5):
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import (
+    RandomizedSearchCV, ParameterGrid, ParameterSampler,
+    check_cv, cross_val_score, train_test_split
+)
+
+# LogisticRegression solvers that can start from the previous coefficients
+WARM_START_SOLVERS = {'lbfgs', 'newton-cg', 'newton-cholesky', 'sag', 'saga'}
+
+def tune_pipeline(pipeline, param_dist, X, y, n_iter=20, cv=5,
+                  method='random', time_budget=None):
     """
-    Run randomized search over hyperparameter distributions
-    to optimize the pipeline for ROC-AUC.
+    Search hyperparameters to optimize the pipeline for ROC-AUC.
     - pipeline: a scikit-learn Pipeline object
     - param_dist: dictionary of parameter distributions to sample
     - X, y: feature matrix and target vector
-    - n_iter: number of parameter settings to try
-    - cv: number of cross-validation folds
-    Returns the best-estimator pipeline with tuned hyperparameters.
+    - n_iter: number of parameter settings to try ('random' and 'halving')
+    - cv: number of cross-validation folds, or a CV splitter
+    - method:
+      'random' runs RandomizedSearchCV;
+      'path' fits the preprocessing once per fold and computes the whole
+      C path of the LogisticRegression with warm starts;
+      'halving' runs successive halving over sampled candidates on growing
+      stratified subsets, for larger or non-linear search spaces
+    - time_budget: wall-clock seconds for 'path' and 'halving'; once spent,
+      no new candidates are started and the best one scored so far wins
+    Prints a per-candidate timing report.
+    Returns the best-estimator pipeline with tuned hyperparameters,
+    refit on X, y.
     """
+    if method == 'random':
+        if time_budget is not None:
+            raise ValueError("time_budget needs method='path' or 'halving'")
+        return _random_search(pipeline, param_dist, X, y, n_iter, cv)
+    if method == 'path':
+        best, rows = _path_search(pipeline, param_dist, X, y, cv, time_budget)
+    elif method == 'halving':
+        best, rows = _halving_search(pipeline, param_dist, X, y, n_iter, cv, time_budget)
+    else:
+        raise ValueError(f"Unknown tuning method {method!r}")
+
+    _print_report(rows)
+    print("Best params:", best['params'])
+    print(f"Best CV ROC-AUC: {best['score']:.4f}")
+
+    # refit the winner on all the data, like RandomizedSearchCV(refit=True)
+    return clone(pipeline).set_params(**best['params']).fit(X, y)
+
+def _random_search(pipeline, param_dist, X, y, n_iter, cv):
     # set up RandomizedSearchCV with ROC-AUC as the scoring metric
     search = RandomizedSearchCV(
         estimator=pipeline, # pipeline containing preprocessing and classifier
@@ -26,9 +69,175 @@ def tune_pipeline(pipeline, param_dist, X, y, n_iter=20, cv=5):
     # run the search on the training data
     search.fit(X, y)
 
+    # per-candidate timing from the search results (fit time summed over folds)
+    results = search.cv_results_
+    n_splits = search.n_splits_
+    _print_report([
+        {
+            'params': params,
+            'score': score,
+            'seconds': (fit + score_time) * n_splits,
+            'note': ''
+        }
+        for params, score, fit, score_time in zip(
+            results['params'], results['mean_test_score'],
+            results['mean_fit_time'], results['mean_score_time']
+        )
+    ])
+
     # print out the best parameters and associated CV score
     print("Best params:", search.best_params_)
     print(f"Best CV ROC-AUC: {search.best_score_:.4f}")
 
     # return the pipeline configured with the best-found hyperparameters
     return search.best_estimator_
+
+def _path_search(pipeline, param_dist, X, y, cv, time_budget):
+    """
+    Regularization path: per fold the preprocessing is fitted once, then
+    for each combination of the other clf__* parameters the classifier is
+    fitted along increasing C, each fit starting from the previous
+    coefficients. liblinear cannot warm start: its candidates still share
+    the per-fold preprocessing but fit every C from scratch.
+    """
+    clf = pipeline.steps[-1][1]
+    step = pipeline.steps[-1][0]
+    if not isinstance(clf, LogisticRegression):
+        raise ValueError("method='path' needs a LogisticRegression classifier, use method='halving'")
+    prefix = f'{step}__'
+    if any(not key.startswith(prefix) for key in param_dist):
+        raise ValueError(f"method='path' only tunes {prefix}* parameters, use method='halving'")
+    if any(not isinstance(values, (list, tuple)) for values in param_dist.values()):
+        raise ValueError("method='path' needs lists of values, not distributions")
+
+    start = time.perf_counter()
+    c_key = f'{prefix}C'
+    c_values = sorted(param_dist.get(c_key, [clf.C]))
+    groups = _path_groups(
+        {key: values for key, values in param_dist.items() if key != c_key}, prefix
+    )
+
+    # fit the preprocessing once per fold and keep the transformed matrices
+    cv = check_cv(cv, y, classifier=True)
+    y = np.asarray(y)
+    folds = []
+    for train_idx, val_idx in cv.split(X, y):
+        preproc = clone(pipeline[:-1])
+        Xt_train = preproc.fit_transform(X.iloc[train_idx], y[train_idx])
+        folds.append((Xt_train, y[train_idx], preproc.transform(X.iloc[val_idx]), y[val_idx]))
+
+    rows = []
+    for params, note in groups:
+        # always finish the first group so there is a winner
+        if rows and _out_of_time(start, time_budget):
+            break
+        # the folds of one path run in parallel, like the search's fits
+        model = clone(clf).set_params(
+            **{key[len(prefix):]: value for key, value in params.items()}
+        )
+        model.set_params(warm_start=model.solver in WARM_START_SOLVERS)
+        results = Parallel(n_jobs=-1)(
+            delayed(_fit_path)(clone(model), c_values, *fold) for fold in folds
+        )
+        scores = np.array([fold_scores for fold_scores, _ in results])
+        seconds = np.sum([fold_seconds for _, fold_seconds in results], axis=0)
+        for i, C in enumerate(c_values):
+            rows.append({
+                'params': {**params, c_key: C},
+                'score': scores[:, i].mean(),
+                'seconds': seconds[i],
+                'note': note
+            })
+
+    best = max(rows, key=lambda row: row['score'])
+    return best, rows
+
+def _fit_path(model, c_values, Xt_train, y_train, Xt_val, y_val):
+    # fit along increasing C, each fit warm-started from the previous one
+    # when the solver supports it
+    scores = []
+    seconds = []
+    for C in c_values:
+        t0 = time.perf_counter()
+        model.set_params(C=C).fit(Xt_train, y_train)
+        scores.append(roc_auc_score(y_val, model.decision_function(Xt_val)))
+        seconds.append(time.perf_counter() - t0)
+    return scores, seconds
+
+def _path_groups(other_params, prefix):
+    # one path per combination of the non-C parameters
+    groups = []
+    for params in ParameterGrid(other_params):
+        solver = params.get(f'{prefix}solver')
+        note = f'{solver}: no warm start' if solver and solver not in WARM_START_SOLVERS else ''
+        groups.append((params, note))
+    return groups
+
+def _halving_search(pipeline, param_dist, X, y, n_iter, cv, time_budget,
+                    factor=3, min_resources=500):
+    """
+    Successive halving: every candidate is cross-validated on a small
+    stratified subset, the best 1/factor go on to a subset factor times
+    larger, until the last round uses all rows.
+    """
+    start = time.perf_counter()
+    candidates = list(ParameterSampler(param_dist, n_iter=n_iter, random_state=42))
+    n_rows = len(y)
+
+    # subset sizes grow by `factor` and end at the full data
+    n_rounds = max(1, math.ceil(math.log(len(candidates), factor)) + 1)
+    sizes = [
+        max(min(min_resources, n_rows), int(n_rows / factor ** (n_rounds - 1 - r)))
+        for r in range(n_rounds)
+    ]
+    cv = check_cv(cv, y, classifier=True)
+
+    rows = []
+    survivors = candidates
+    best = None
+    for r, size in enumerate(sizes):
+        if size < n_rows:
+            X_sub, _, y_sub, _ = train_test_split(
+                X, y, train_size=size, stratify=y, random_state=42
+            )
+        else:
+            X_sub, y_sub = X, y
+
+        scored = []
+        for params in survivors:
+            if (scored or best) and _out_of_time(start, time_budget):
+                break
+            t0 = time.perf_counter()
+            score = cross_val_score(
+                clone(pipeline).set_params(**params), X_sub, y_sub,
+                cv=cv, scoring='roc_auc', n_jobs=-1
+            ).mean()
+            seconds = time.perf_counter() - t0
+            scored.append((score, params))
+            rows.append({
+                'params': params,
+                'score': score,
+                'seconds': seconds,
+                'note': f'round {r + 1}/{n_rounds}, {len(y_sub)} rows'
+            })
+
+        # a round cut short by the budget only counts if nothing finished before it
+        if scored and (len(scored) == len(survivors) or best is None):
+            scored.sort(key=lambda item: item[0], reverse=True)
+            best = {'params': scored[0][1], 'score': scored[0][0]}
+        if _out_of_time(start, time_budget) or r == n_rounds - 1:
+            break
+        survivors = [params for _, params in scored[:max(1, math.ceil(len(scored) / factor))]]
+
+    return best, rows
+
+def _out_of_time(start, time_budget):
+    return time_budget is not None and time.perf_counter() - start > time_budget
+
+def _print_report(rows):
+    # one line per candidate, best first
+    print(f"\n{'ROC-AUC':>8} {'fit s':>8}  params")
+    for row in sorted(rows, key=lambda row: row['score'], reverse=True):
+        note = f"  [{row['note']}]" if row['note'] else ''
+        print(f"{row['score']:8.4f} {row['seconds']:8.2f}  {row['params']}{note}")
+    print(f"{len(rows)} candidates, {sum(row['seconds'] for row in rows):.2f}s fitting\n")
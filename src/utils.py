@@ -1,5 +1,6 @@
 import os
 import pandas as pd
+from scipy import sparse
 
 def load_data(path):
     """
@@ -35,3 +36,48 @@ def save_fig(fig, filename, **kwargs):
             dpi=kwargs.get('dpi', 100),
             bbox_inches=kwargs.get('bbox_inches', 'tight')
         )
+
+def matrix_memory(X):
+    """
+    Memory footprint of a feature matrix.
+    - X: a scipy sparse matrix, NumPy array or DataFrame (dense or sparse)
+    - returns: dict with the representation, shape, density and the bytes
+      used as stored, as dense float64 and as CSR
+    """
+    if isinstance(X, pd.DataFrame):
+        if all(isinstance(t, pd.SparseDtype) for t in X.dtypes):
+            X = X.sparse.to_coo().tocsr()
+        else:
+            X = X.to_numpy(dtype=float)
+
+    n_rows, n_cols = X.shape
+    dense_bytes = n_rows * n_cols * 8
+    if sparse.issparse(X):
+        X = X.tocsr()
+        stored = X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+        nnz = X.nnz
+    else:
+        stored = X.nbytes
+        nnz = int((X != 0).sum())
+    # CSR: value + column index per non-zero, one row pointer per row
+    csr_bytes = nnz * (8 + 4) + (n_rows + 1) * 4
+
+    return {
+        'kind': 'sparse' if sparse.issparse(X) else 'dense',
+        'shape': (n_rows, n_cols),
+        'density': nnz / (n_rows * n_cols) if n_rows * n_cols else 0.0,
+        'stored_bytes': stored,
+        'dense_bytes': dense_bytes,
+        'csr_bytes': csr_bytes
+    }
+
+def report_memory(X, name='X'):
+    """
+    Print the memory footprint of a feature matrix as stored, dense and CSR.
+    """
+    m = matrix_memory(X)
+    mb = 2 ** 20
+    print(f"{name}: {m['shape'][0]:,} x {m['shape'][1]:,} {m['kind']}, "
+          f"density {m['density']:.1%} | stored {m['stored_bytes'] / mb:.2f} MB, "
+          f"dense {m['dense_bytes'] / mb:.2f} MB, CSR {m['csr_bytes'] / mb:.2f} MB")
+    return m